@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from app.models import UserCreate, normalize_email
+
+# 📦 Parsing and validation for POST /users/bulk and GET /users/export
+MAX_BULK_ROWS = 100_000
+CSV_FIELDS = ["name", "email", "age"]
+EXPORT_FIELDS = ["id", *CSV_FIELDS]
+
+# the same validation as /users_post (emails: models.validate_email_address)
+users_adapter = TypeAdapter(list[UserCreate])
+
+def parse_rows(body: bytes, content_type: str) -> list:
+    """Rows from a JSON array, or from a CSV body (Content-Type: text/csv) with a header line."""
+    if content_type.split(";")[0].strip() == "text/csv":
+        return list(csv.DictReader(io.StringIO(body.decode("utf-8-sig"))))
+    rows = json.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of users")
+    return rows
+
+def read_rows(body: bytes, content_type: str) -> list:
+    """parse_rows() with the failures turned into 400/413 responses."""
+    try:
+        rows = parse_rows(body, content_type)
+    except (ValueError, csv.Error) as exc:
+        raise HTTPException(status_code=400, detail=f"Unreadable upload: {exc}")
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ROWS} users per upload")
+    return rows
+
+def validate_rows(rows: list) -> tuple[list[int], list[dict], dict[int, list[dict]]]:
+    """Validate every row in one TypeAdapter pass.
+
+    Returns the indexes of the valid rows, their insert values and the errors of
+    the others by row index. A row repeating an earlier row's email is an error.
+    """
+    errors = {}
+    try:
+        users = users_adapter.validate_python(rows)
+        indexes = list(range(len(rows)))
+    except ValidationError as exc:
+        for error in exc.errors(include_url=False):
+            index, *field = error["loc"]
+            errors.setdefault(index, []).append({"field": ".".join(map(str, field)), "message": error["msg"]})
+        indexes = [index for index in range(len(rows)) if index not in errors]
+        # second pass over the rows that passed, to get their values (domains are cached by now)
+        users = users_adapter.validate_python([rows[index] for index in indexes])
+
+    values, valid_indexes, seen = [], [], set()
+    for index, user in zip(indexes, users):
+        email_normalized = normalize_email(user.email)
+        if email_normalized in seen:
+            errors[index] = [{"field": "email", "message": "Duplicate email in upload"}]
+            continue
+        seen.add(email_normalized)
+        valid_indexes.append(index)
+        values.append({"name": user.name, "email": user.email, "age": user.age, "email_normalized": email_normalized})
+    return valid_indexes, values, errors
+
+def bulk_report(rows: list, indexes: list[int], values: list[dict], errors: dict, inserted: set[str]) -> dict:
+    """Response body: counts plus per-row errors, rows skipped as already registered included."""
+    for index, row in zip(indexes, values):
+        if row["email_normalized"] not in inserted:
+            errors[index] = [{"field": "email", "message": "Email already registered"}]
+    return {
+        "received": len(rows),
+        "inserted": len(inserted),
+        "errors": [{"row": index, "errors": errors[index]} for index in sorted(errors)],
+    }
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def export_chunk(rows, format: str, header: bool = False) -> str:
+    """Encode a batch of (id, name, email, age) rows; one chunk per batch keeps the stream cheap."""
+    buffer = io.StringIO()
+    if format == "ndjson":
+        buffer.writelines(json.dumps(dict(zip(EXPORT_FIELDS, row)), separators=(",", ":")) + "\n" for row in rows)
+    else:
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(EXPORT_FIELDS)
+        writer.writerows(rows)
+    return buffer.getvalue()
@@ -1,29 +1,83 @@
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import Session, select
-from app.models import User
+from app.models import User, UserBase, normalize_email
 from app.database import engine
 
+# ✉️ Duplicate emails are caught by the unique index on email_normalized:
+#    commit raises sqlalchemy.exc.IntegrityError, the routes answer 409.
 def create_user(user: User):
     with Session(engine) as session:
+        user.email_normalized = normalize_email(user.email)
         session.add(user)
         session.commit()
         session.refresh(user)
         return user
 
-def get_users():
+STREAM_BATCH_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+
+def users_page_query(limit: int | None = None, after_id: int | None = None):
+    """Users in id order, starting after ``after_id`` (keyset pagination, no OFFSET scan)."""
+    query = select(User).order_by(User.id)
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def get_users(limit: int | None = None, after_id: int | None = None):
+    with Session(engine) as session:
+        return session.exec(users_page_query(limit, after_id)).all()
+
+def bulk_insert_query():
+    """Multi-row INSERT that skips emails already registered and returns the ones it inserted.
+
+    Core, not ORM: the rows are plain dicts and never become User objects.
+    """
+    table = User.__table__
+    return (
+        sqlite_insert(table)
+        .on_conflict_do_nothing(index_elements=[table.c.email_normalized])
+        .returning(table.c.email_normalized)
+    )
+
+def bulk_create_users(values: list[dict]) -> set[str]:
+    """Insert all rows (dicts with email_normalized set) in one transaction."""
+    if not values:
+        return set()
+    with engine.begin() as conn:
+        return set(conn.execute(bulk_insert_query(), values).scalars())
+
+def user_rows_query(limit: int | None = None, after_id: int | None = None):
+    # plain (id, name, email, age) tuples: no User objects for exports and NDJSON streams
+    query = select(User.id, User.name, User.email, User.age).order_by(User.id)
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.execution_options(yield_per=STREAM_BATCH_SIZE)
+
+def iter_user_rows(limit: int | None = None, after_id: int | None = None):
+    """Yield users as lists of row tuples, STREAM_BATCH_SIZE at a time."""
     with Session(engine) as session:
-        return session.exec(select(User)).all()
+        yield from session.exec(user_rows_query(limit, after_id)).partitions()
 
 def get_user(user_id: int):
     with Session(engine) as session:
         return session.get(User, user_id)
 
-def update_user(user_id: int, updated_data: User):
+def get_user_by_email(email: str):
+    with Session(engine) as session:
+        return session.exec(select(User).where(User.email_normalized == normalize_email(email))).first()
+
+def update_user(user_id: int, updated_data: UserBase):
     with Session(engine) as session:
         db_user = session.get(User, user_id)
         if db_user:
             db_user.name = updated_data.name
             db_user.email = updated_data.email
             db_user.age = updated_data.age
+            db_user.email_normalized = normalize_email(updated_data.email)
             session.commit()
             session.refresh(db_user)
             return db_user
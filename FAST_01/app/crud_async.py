@@ -0,0 +1,54 @@
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.crud import bulk_insert_query, user_rows_query, users_page_query
+from app.models import User, UserBase, normalize_email
+
+# ✍️ Writes only flush: they run inside app/writer.py's group transaction,
+#    which commits them. Reads use their own session.
+async def create_user(session: AsyncSession, user: User):
+    user.email_normalized = normalize_email(user.email)
+    session.add(user)
+    await session.flush()
+    return user
+
+async def get_users(session: AsyncSession, limit: int | None = None, after_id: int | None = None):
+    result = await session.exec(users_page_query(limit, after_id))
+    return result.all()
+
+async def bulk_create_users(session: AsyncSession, values: list[dict]) -> set[str]:
+    if not values:
+        return set()
+    conn = await session.connection()
+    result = await conn.execute(bulk_insert_query(), values)
+    return set(result.scalars())
+
+async def iter_user_rows(session: AsyncSession, limit: int | None = None, after_id: int | None = None):
+    result = await session.stream(user_rows_query(limit, after_id))
+    async for rows in result.partitions():
+        yield rows
+
+async def get_user(session: AsyncSession, user_id: int):
+    return await session.get(User, user_id)
+
+async def get_user_by_email(session: AsyncSession, email: str):
+    result = await session.exec(select(User).where(User.email_normalized == normalize_email(email)))
+    return result.first()
+
+async def update_user(session: AsyncSession, user_id: int, updated_data: UserBase):
+    db_user = await session.get(User, user_id)
+    if db_user:
+        db_user.name = updated_data.name
+        db_user.email = updated_data.email
+        db_user.age = updated_data.age
+        db_user.email_normalized = normalize_email(updated_data.email)
+        await session.flush()
+        return db_user
+    return None
+
+async def delete_user(session: AsyncSession, user_id: int):
+    user = await session.get(User, user_id)
+    if user:
+        await session.delete(user)
+        await session.flush()
+        return True
+    return False
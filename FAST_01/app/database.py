@@ -1,10 +1,120 @@
-from sqlmodel import SQLModel, create_engine
+import os
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import normalize_email
 
 
-sqlite_file_name = "database.db"
+sqlite_file_name = os.getenv("SQLITE_FILE", "database.db")
 sqlite_url = f"sqlite:///{sqlite_file_name}"
+async_sqlite_url = f"sqlite+aiosqlite:///{sqlite_file_name}"
 
-engine = create_engine(sqlite_url, echo=True)
+# SQL logging is off unless SQL_ECHO=1 (it costs more than the queries themselves)
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
\ No newline at end of file
+# 🏎️ SQLite performance profile, applied to every new connection.
+# WAL lets readers run while a write is in progress; synchronous=NORMAL only
+# fsyncs at checkpoints (a power loss may drop the last commits, never corrupt).
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MB
+    "busy_timeout": 5000,  # ms to wait for a lock instead of "database is locked"
+}
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+engine = create_engine(sqlite_url, echo=SQL_ECHO)
+event.listen(engine, "connect", _apply_pragmas)
+
+# ⚡ Async engine for DB_MODE=async (app/routes_async.py), used for reads
+async_engine = create_async_engine(async_sqlite_url, echo=SQL_ECHO)
+event.listen(async_engine.sync_engine, "connect", _apply_pragmas)
+AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
+async def get_session():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+# ✍️ The one connection all async-mode writes go through (app/writer.py).
+# The driver's own transaction handling is switched off so that SAVEPOINTs
+# work and every transaction starts with BEGIN IMMEDIATE (takes the write lock
+# up front instead of failing to upgrade a read lock half way through).
+writer_engine = create_async_engine(async_sqlite_url, echo=SQL_ECHO, pool_size=1, max_overflow=0)
+
+@event.listens_for(writer_engine.sync_engine, "connect")
+def _writer_connect(dbapi_connection, connection_record):
+    _apply_pragmas(dbapi_connection, connection_record)
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(writer_engine.sync_engine, "begin")
+def _writer_begin(conn):
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+WriterSessionLocal = sessionmaker(bind=writer_engine, class_=AsyncSession, expire_on_commit=False)
+
+# 🧭 Schema migrations, tracked in SQLite's PRAGMA user_version.
+# Run them once with `python -m app.database`; startup only reads the version.
+# Each step is frozen DDL: later changes to app/models.py need a new step.
+def create_user_table(conn):
+    conn.exec_driver_sql('''
+        CREATE TABLE IF NOT EXISTS "user" (
+            name VARCHAR NOT NULL,
+            email VARCHAR NOT NULL,
+            age INTEGER NOT NULL,
+            id INTEGER NOT NULL,
+            PRIMARY KEY (id)
+        )
+    ''')
+
+def add_email_normalized(conn):
+    # databases whose step 1 was still create_all on the current model already have it
+    columns = {row[1] for row in conn.exec_driver_sql('PRAGMA table_info("user")')}
+    if "email_normalized" not in columns:
+        conn.exec_driver_sql('ALTER TABLE "user" ADD COLUMN email_normalized VARCHAR')
+    # backfilled in Python so existing rows are normalized exactly like new ones
+    rows = conn.exec_driver_sql('SELECT id, email FROM "user"').all()
+    if rows:
+        conn.exec_driver_sql(
+            'UPDATE "user" SET email_normalized = ? WHERE id = ?',
+            [(normalize_email(email), user_id) for user_id, email in rows],
+        )
+    # fails if two existing users share an address: fix those rows, then re-run
+    conn.exec_driver_sql(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ix_user_email_normalized ON "user" (email_normalized)'
+    )
+
+MIGRATIONS = [
+    create_user_table,  # 1: user table
+    add_email_normalized,  # 2: unique, case-normalized email lookup column
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def migrate():
+    with engine.begin() as conn:
+        for version in range(get_schema_version(conn) + 1, SCHEMA_VERSION + 1):
+            MIGRATIONS[version - 1](conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+
+def check_schema_version():
+    with engine.connect() as conn:
+        current = get_schema_version(conn)
+    if current != SCHEMA_VERSION:
+        raise RuntimeError(
+            f"{sqlite_file_name} is at schema version {current}, expected {SCHEMA_VERSION}. "
+            "Run `python -m app.database`."
+        )
+
+if __name__ == "__main__":
+    migrate()
+    print(f"✅ {sqlite_file_name} is at schema version {SCHEMA_VERSION}")
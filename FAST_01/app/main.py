@@ -1,28 +1,108 @@
-from fastapi import FastAPI, HTTPException
-from app.models import User, UserCreate
-from app.database import create_db_and_tables
-from app.crud import create_user, get_users, get_user, update_user, delete_user
+import itertools
+import os
+from typing import Literal
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app import bulk, routes_async
+from sqlalchemy.exc import IntegrityError
+from app.models import User, UserCreate, UserRead
+from app.database import async_engine, writer_engine, check_schema_version
+from app.writer import write_queue
+from app.crud import MAX_PAGE_SIZE, bulk_create_users, create_user, get_users, iter_user_rows, get_user, get_user_by_email, update_user, delete_user
+
+# 🔀 DB_MODE=sync (default): def routes on the sync engine, run in the threadpool
+#    DB_MODE=async: async routes on aiosqlite (app/routes_async.py)
+DB_MODE = os.getenv("DB_MODE", "sync")
+if DB_MODE not in ("sync", "async"):
+    raise RuntimeError(f"DB_MODE must be 'sync' or 'async', not {DB_MODE!r}")
 
 app = FastAPI()
+sync_router = APIRouter()
 
+# ✅ Schema is created by `python -m app.database`; startup only checks its version
 @app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
+async def on_startup():
+    check_schema_version()
+    if DB_MODE == "async":
+        await write_queue.start()
+
+# ✅ Shutdown: commit queued writes before the engines go away
+@app.on_event("shutdown")
+async def on_shutdown():
+    await write_queue.stop()
+    await async_engine.dispose()
+    await writer_engine.dispose()
+
+# 📈 Group-commit writer metrics (DB_MODE=async)
+@app.get("/metrics/write-queue")
+async def write_queue_metrics():
+    return write_queue.stats()
 
 # ✅ POST: Create new user
-@app.post("/users_post", response_model=User)
+@sync_router.post("/users_post", response_model=UserRead)
 def api_create_user(user: UserCreate):
-    return create_user(User.from_orm(user))
+    try:
+        return create_user(User.from_orm(user))
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Email already registered")
+
+
+# ✅ GET: All users (no parameters, as before), one page (?limit=&cursor=,
+#    next page's cursor in X-Next-Cursor) or streamed as NDJSON (?format=ndjson)
+@sync_router.get("/users_get", response_model=list[UserRead])
+def api_get_users(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: int | None = None,
+    format: Literal["json", "ndjson"] = "json",
+):
+    if format == "ndjson":
+        # one chunk per STREAM_BATCH_SIZE rows, like /users/export
+        chunks = (bulk.export_chunk(rows, "ndjson") for rows in iter_user_rows(limit, cursor))
+        return StreamingResponse(chunks, media_type="application/x-ndjson")
+    users = get_users(limit, cursor)
+    if limit is not None and len(users) == limit:
+        response.headers["X-Next-Cursor"] = str(users[-1].id)
+    return users
+
+
+# 📦 POST: Many users at once, as a JSON array or a CSV body (Content-Type: text/csv).
+#    Valid rows are inserted in one transaction; the others are reported by row index.
+@sync_router.post("/users/bulk")
+async def api_bulk_create_users(request: Request):
+    rows = bulk.read_rows(await request.body(), request.headers.get("content-type", ""))
+    indexes, values, errors = await run_in_threadpool(bulk.validate_rows, rows)
+    inserted = await run_in_threadpool(bulk_create_users, values)
+    return bulk.bulk_report(rows, indexes, values, errors, inserted)
 
 
-# ✅ GET: All users
-@app.get("/users_get", response_model=list[User])
-def api_get_users():
-    return get_users()
+# 📦 GET: All users streamed as CSV (default) or NDJSON
+@sync_router.get("/users/export")
+def api_export_users(format: Literal["csv", "ndjson"] = "csv"):
+    # one chunk per STREAM_BATCH_SIZE rows: a sync iterator costs a threadpool hop per item
+    chunks = itertools.chain(
+        [bulk.export_chunk([], format, header=True)],
+        (bulk.export_chunk(rows, format) for rows in iter_user_rows()),
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=bulk.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+# ✅ GET: One user by email (case-insensitive, uses the unique index)
+@sync_router.get("/users/by-email/{email}", response_model=UserRead)
+def api_get_user_by_email(email: str):
+    user = get_user_by_email(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 
 # ✅ GET: One user by ID
-@app.get("/users/{user_id}", response_model=User)
+@sync_router.get("/users/{user_id}", response_model=UserRead)
 def api_get_user(user_id: int):
     user = get_user(user_id)
     if not user:  # ⛔ "If" → "if"
@@ -31,18 +111,24 @@ def api_get_user(user_id: int):
 
 
 # ✅ PUT: Update user
-@app.put("/users/{user_id}", response_model=User)
-def api_update_user(user_id: int, user: User):
-    updated = update_user(user_id, user)
+@sync_router.put("/users/{user_id}", response_model=UserRead)
+def api_update_user(user_id: int, user: UserCreate):
+    try:
+        updated = update_user(user_id, user)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Email already registered")
     if not updated:
         raise HTTPException(status_code=404, detail="User not found")
     return updated
 
 
 # ✅ DELETE: Delete user
-@app.delete("/users/{user_id}")
+@sync_router.delete("/users/{user_id}")
 def api_delete_user(user_id: int):
     success = delete_user(user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted successfully"}
+
+
+app.include_router(routes_async.router if DB_MODE == "async" else sync_router)
@@ -0,0 +1,110 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import bulk, crud_async
+from app.crud import MAX_PAGE_SIZE
+from app.database import AsyncSessionLocal, get_session
+from sqlalchemy.exc import IntegrityError
+from app.models import User, UserCreate, UserRead
+from app.writer import write_queue
+
+# ⚡ Same routes as app/main.py, on the aiosqlite engine (DB_MODE=async).
+#    Reads use a session per request; writes go through the single writer.
+router = APIRouter()
+
+# ✅ POST: Create new user
+@router.post("/users_post", response_model=UserRead)
+async def api_create_user(user: UserCreate):
+    db_user = User.model_validate(user)
+    try:
+        return await write_queue.submit(lambda session: crud_async.create_user(session, db_user))
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Email already registered")
+
+
+# ✅ GET: All users, one page (?limit=&cursor=) or streamed as NDJSON (?format=ndjson)
+@router.get("/users_get", response_model=list[UserRead])
+async def api_get_users(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: int | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    session: AsyncSession = Depends(get_session),
+):
+    if format == "ndjson":
+        async def lines():
+            # own session: the request's one may be closed before the body is sent
+            async with AsyncSessionLocal() as stream_session:
+                async for rows in crud_async.iter_user_rows(stream_session, limit, cursor):
+                    yield bulk.export_chunk(rows, "ndjson")
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    users = await crud_async.get_users(session, limit, cursor)
+    if limit is not None and len(users) == limit:
+        response.headers["X-Next-Cursor"] = str(users[-1].id)
+    return users
+
+
+# 📦 POST: Many users at once, as a JSON array or a CSV body (Content-Type: text/csv).
+#    The insert is a single operation on the writer, i.e. one transaction.
+@router.post("/users/bulk")
+async def api_bulk_create_users(request: Request):
+    rows = bulk.read_rows(await request.body(), request.headers.get("content-type", ""))
+    indexes, values, errors = await run_in_threadpool(bulk.validate_rows, rows)
+    inserted = await write_queue.submit(lambda session: crud_async.bulk_create_users(session, values))
+    return bulk.bulk_report(rows, indexes, values, errors, inserted)
+
+
+# 📦 GET: All users streamed as CSV (default) or NDJSON
+@router.get("/users/export")
+async def api_export_users(format: Literal["csv", "ndjson"] = "csv"):
+    async def lines():
+        yield bulk.export_chunk([], format, header=True)
+        async with AsyncSessionLocal() as session:
+            async for rows in crud_async.iter_user_rows(session):
+                yield bulk.export_chunk(rows, format)
+    return StreamingResponse(
+        lines(),
+        media_type=bulk.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+# ✅ GET: One user by email (case-insensitive, uses the unique index)
+@router.get("/users/by-email/{email}", response_model=UserRead)
+async def api_get_user_by_email(email: str, session: AsyncSession = Depends(get_session)):
+    user = await crud_async.get_user_by_email(session, email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+# ✅ GET: One user by ID
+@router.get("/users/{user_id}", response_model=UserRead)
+async def api_get_user(user_id: int, session: AsyncSession = Depends(get_session)):
+    user = await crud_async.get_user(session, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+# ✅ PUT: Update user
+@router.put("/users/{user_id}", response_model=UserRead)
+async def api_update_user(user_id: int, user: UserCreate):
+    try:
+        updated = await write_queue.submit(lambda session: crud_async.update_user(session, user_id, user))
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Email already registered")
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
+    return updated
+
+
+# ✅ DELETE: Delete user
+@router.delete("/users/{user_id}")
+async def api_delete_user(user_id: int):
+    success = await write_queue.submit(lambda session: crud_async.delete_user(session, user_id))
+    if not success:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"message": "User deleted successfully"}
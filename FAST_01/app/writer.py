@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import WriterSessionLocal
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_MAX = 256
+
+class WriteQueue:
+    """Runs every async-mode write on one connection, committing them in groups.
+
+    SQLite allows a single writer at a time, so instead of many sessions racing
+    for the lock (and readers waiting behind them) writes are queued and a
+    single task takes whatever has queued up — up to ``max_batch`` operations —
+    and runs it in one transaction. Each operation gets its own SAVEPOINT, so
+    one failing write is rolled back and reported to its caller without
+    affecting the rest of the group. While a group commits the next one fills.
+    """
+
+    def __init__(self, max_batch: int = WRITE_BATCH_MAX):
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.commits = 0
+        self.writes = 0
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Commit everything still queued, then stop the writer."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, operation: Callable[[AsyncSession], Awaitable]):
+        """Run ``operation(session)`` in the next group; returns its result once committed."""
+        if self._task is None:
+            raise RuntimeError("WriteQueue is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit(self, batch):
+        outcomes = []
+        try:
+            async with WriterSessionLocal() as session:
+                for operation, _ in batch:
+                    try:
+                        async with session.begin_nested():
+                            outcomes.append(await operation(session))
+                    except Exception as exc:
+                        outcomes.append(exc)
+                await session.commit()
+        except Exception as exc:
+            logger.exception("Group commit of %d writes failed", len(batch))
+            outcomes = [exc] * len(batch)
+        else:
+            self.commits += 1
+            self.writes += len(batch)
+
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "commits": self.commits,
+            "writes": self.writes,
+            "avg_group_size": round(self.writes / self.commits, 2) if self.commits else 0.0,
+        }
+
+
+# ✍️ One writer per process, started and drained by app.main in DB_MODE=async
+write_queue = WriteQueue()
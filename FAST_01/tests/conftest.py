@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# app.database opens its engines on import, so point them at a scratch file first
+os.environ["SQLITE_FILE"] = os.path.join(tempfile.mkdtemp(prefix="fast01-tests-"), "database.db")
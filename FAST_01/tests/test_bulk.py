@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app import database
+from app.main import app
+from tests.test_migrations import empty_db  # noqa: F401  (fresh database file per test)
+
+@pytest.fixture
+def client(empty_db):
+    database.migrate()
+    with TestClient(app) as client:
+        yield client
+
+def test_bulk_json_reports_each_bad_row(client):
+    client.post("/users_post", json={"name": "Taken", "email": "taken@example.com", "age": 40})
+    rows = [
+        {"name": "Ada", "email": "Ada@Example.COM", "age": 30},
+        {"name": "B", "email": "b@example.com", "age": 30},          # name too short
+        {"name": "Carl", "email": "not-an-email", "age": 30},
+        {"name": "Dora", "email": "ADA@example.com", "age": 30},     # repeats row 0
+        {"name": "Eve", "email": "TAKEN@example.com", "age": 30},    # already registered
+        {"name": "Finn", "email": "finn@example.com", "age": "31"},
+    ]
+    report = client.post("/users/bulk", json=rows).json()
+    assert report["received"] == 6 and report["inserted"] == 2
+    messages = {error["row"]: error["errors"][0] for error in report["errors"]}
+    assert sorted(messages) == [1, 2, 3, 4]
+    assert messages[1]["field"] == "name"
+    assert messages[2] == {"field": "email", "message": "value is not a valid email address: An email address must have an @-sign."}
+    assert messages[3]["message"] == "Duplicate email in upload"
+    assert messages[4]["message"] == "Email already registered"
+    assert client.get("/users/by-email/ada@example.com").json()["email"] == "Ada@example.com"
+
+@pytest.mark.parametrize("email", ["a@foo.test", "a@mail.local", "a@example.invalid", "José@example.com", "Ada@Example.COM", "a..b@example.com"])
+def test_bulk_and_single_create_agree_on_emails(client, email):
+    single = client.post("/users_post", json={"name": "Single", "email": email, "age": 30})
+    report = client.post("/users/bulk", json=[{"name": "Bulk", "email": email.upper().replace("@", "+bulk@"), "age": 30}]).json()
+    if single.status_code == 200:
+        assert report["inserted"] == 1
+        assert client.get(f"/users/by-email/{single.json()['email']}").json() == single.json()
+    else:
+        assert single.status_code == 422 and report["inserted"] == 0
+        assert report["errors"][0]["errors"][0]["message"] == single.json()["detail"][0]["msg"]
+
+def test_bulk_csv_and_export_round_trip(client):
+    body = "name,email,age\nAda,ada@example.com,30\nBob,bob@example.com,41\n"
+    report = client.post("/users/bulk", content=body, headers={"Content-Type": "text/csv"}).json()
+    assert report == {"received": 2, "inserted": 2, "errors": []}
+    exported = list(csv.DictReader(io.StringIO(client.get("/users/export").text)))
+    assert [(row["name"], row["email"], row["age"]) for row in exported] == [
+        ("Ada", "ada@example.com", "30"), ("Bob", "bob@example.com", "41"),
+    ]
+    lines = client.get("/users/export", params={"format": "ndjson"}).text.splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Ada", "Bob"]
+
+def test_bulk_rejects_unreadable_bodies(client):
+    assert client.post("/users/bulk", content="{", headers={"Content-Type": "application/json"}).status_code == 400
+    assert client.post("/users/bulk", json={"name": "Ada"}).status_code == 400
+
+def test_users_get_ndjson_pages_like_json(client):
+    rows = [{"name": f"User{n}", "email": f"user{n}@example.com", "age": 20 + n} for n in range(5)]
+    client.post("/users/bulk", json=rows)
+    for params in ({}, {"limit": 2}, {"limit": 2, "cursor": 2}, {"cursor": 4}):
+        page = client.get("/users_get", params=params).json()
+        response = client.get("/users_get", params={**params, "format": "ndjson"})
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line) for line in response.text.splitlines()] == page
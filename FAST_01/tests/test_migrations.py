@@ -0,0 +1,119 @@
+import os
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app import database
+from app.main import app
+from app.models import User
+
+# `user` as the first migration created it, before email_normalized existed
+BASELINE_SCHEMA = """
+CREATE TABLE user (
+    name VARCHAR NOT NULL,
+    email VARCHAR NOT NULL,
+    age INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (id)
+)
+"""
+
+@pytest.fixture(autouse=True)
+def empty_db():
+    database.engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(database.sqlite_file_name + suffix):
+            os.remove(database.sqlite_file_name + suffix)
+    yield
+    database.engine.dispose()
+
+def create_baseline(user_version, emails=("Ada@Example.com", "bob@example.com")):
+    with database.engine.begin() as conn:
+        conn.exec_driver_sql(BASELINE_SCHEMA)
+        for email in emails:
+            conn.execute(
+                text('INSERT INTO "user" (name, email, age) VALUES (:name, :email, 30)'),
+                {"name": email.split("@")[0], "email": email},
+            )
+        conn.exec_driver_sql(f"PRAGMA user_version = {user_version}")
+
+def schema_version():
+    with database.engine.connect() as conn:
+        return database.get_schema_version(conn)
+
+def normalized_emails():
+    with database.engine.connect() as conn:
+        return conn.exec_driver_sql('SELECT email_normalized FROM "user" ORDER BY id').scalars().all()
+
+def test_startup_refuses_an_empty_database():
+    with pytest.raises(RuntimeError, match="schema version 0"):
+        with TestClient(app):
+            pass
+
+def test_migrate_creates_an_empty_database():
+    database.migrate()
+    assert schema_version() == database.SCHEMA_VERSION
+    database.check_schema_version()
+    assert normalized_emails() == []
+    with TestClient(app) as client:
+        assert client.post("/users_post", json={"name": "Ada", "email": "Ada@Example.com", "age": 30}).status_code == 200
+        assert client.post("/users_post", json={"name": "Ada", "email": "ada@example.COM", "age": 30}).status_code == 409
+        assert client.get("/users/by-email/ADA@example.com").json()["name"] == "Ada"
+
+@pytest.mark.parametrize("user_version", [0, 1])
+def test_migrate_upgrades_the_baseline_schema(user_version):
+    # 0: created by the old create_all-on-startup, 1: by migration step 1
+    create_baseline(user_version)
+    with pytest.raises(RuntimeError, match=f"schema version {user_version}"):
+        database.check_schema_version()
+    database.migrate()
+    assert schema_version() == database.SCHEMA_VERSION
+    database.check_schema_version()
+    assert normalized_emails() == ["ada@example.com", "bob@example.com"]
+    with database.engine.connect() as conn:
+        indexes = {row[1]: row[2] for row in conn.exec_driver_sql('PRAGMA index_list("user")')}
+    assert indexes["ix_user_email_normalized"] == 1  # unique
+
+def test_migrate_is_a_no_op_when_current():
+    database.migrate()
+    database.migrate()
+    assert schema_version() == database.SCHEMA_VERSION
+
+def test_migrate_stops_on_duplicate_emails_and_can_be_rerun():
+    create_baseline(1, emails=("ada@example.com", "ADA@example.com"))
+    with pytest.raises(Exception, match="UNIQUE"):
+        database.migrate()
+    assert schema_version() == 1
+    with database.engine.begin() as conn:
+        conn.exec_driver_sql("""UPDATE "user" SET email = 'ada2@example.com' WHERE id = 2""")
+    database.migrate()
+    assert schema_version() == database.SCHEMA_VERSION
+    assert normalized_emails() == ["ada@example.com", "ada2@example.com"]
+
+def test_migrated_schema_matches_the_models():
+    database.migrate()
+    with database.engine.connect() as conn:
+        columns = {row[1] for row in conn.exec_driver_sql('PRAGMA table_info("user")')}
+    assert columns == set(User.__table__.columns.keys())
+
+def timed_startup():
+    database.engine.dispose()
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        elapsed = time.perf_counter() - started
+        assert client.get("/users_get", params={"limit": 1}).status_code == 200
+    return elapsed
+
+def test_cold_start_time_does_not_grow_with_the_table():
+    # startup only reads PRAGMA user_version: no create_all, no scans
+    database.migrate()
+    empty = min(timed_startup() for _ in range(3))
+    with database.engine.begin() as conn:
+        conn.exec_driver_sql(
+            "WITH RECURSIVE n(value) AS (SELECT 1 UNION ALL SELECT value + 1 FROM n WHERE value < 200000) "
+            'INSERT INTO "user" (name, email, age, email_normalized) '
+            "SELECT 'user' || value, 'user' || value || '@example.com', 30, 'user' || value || '@example.com' FROM n"
+        )
+    full = min(timed_startup() for _ in range(3))
+    assert full < 0.5, f"cold start took {full:.3f}s"
+    assert full < empty * 3 + 0.05, f"cold start {full:.3f}s with 200k users, {empty:.3f}s empty"
@@ -1,9 +1,11 @@
 # app/auth/auth_bearer.py
 
+from typing import Optional
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi import Request, HTTPException
+from fastapi import Depends, Request, HTTPException
 from starlette.status import HTTP_403_FORBIDDEN
-from app.auth.auth_handler import decode_access_token
+from app import schemas
+from app.auth.auth_handler import get_principal
 
 class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
@@ -18,23 +20,29 @@ class JWTBearer(HTTPBearer):
                     status_code=HTTP_403_FORBIDDEN, detail="Invalid authentication scheme."
                 )
 
-            if not await self.verify_jwt(credentials.credentials):
+            principal = await self.verify_jwt(credentials.credentials)
+            if principal is None:
                 raise HTTPException(
                     status_code=HTTP_403_FORBIDDEN, detail="Invalid or expired token."
                 )
 
+            # 👤 decoded once per request; read it back with get_current_principal
+            request.state.principal = principal
             return credentials.credentials
         else:
             raise HTTPException(
                 status_code=HTTP_403_FORBIDDEN, detail="Authorization token missing."
             )
 
-    async def verify_jwt(self, token: str) -> bool:
+    async def verify_jwt(self, token: str) -> Optional[schemas.Principal]:
         try:
-            await decode_access_token(token)
-            return True
-        except:
-            return False
+            return await get_principal(token)
+        except HTTPException:
+            return None
 
 # ✅ Use this in your routes with: dependencies=[Depends(jwt_bearer)]
 jwt_bearer = JWTBearer()
+
+# ✅ Or take the verified principal directly: principal = Depends(get_current_principal)
+async def get_current_principal(request: Request, token: str = Depends(jwt_bearer)) -> schemas.Principal:
+    return request.state.principal
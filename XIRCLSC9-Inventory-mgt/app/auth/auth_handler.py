@@ -1,10 +1,20 @@
 # app/auth/auth_handler.py
 
-from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import math
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from pydantic import ValidationError
 from fastapi import HTTPException, status
+from app import schemas
+from app.auth.keyring import ASYMMETRIC_ALGORITHMS, KeyRing
 from app.settings import settings
 
 # 🔐 JWT config from settings
@@ -12,16 +22,57 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+# 🔑 RS*/ES* algorithms sign with the keyring's active key; others use SECRET_KEY (HS256)
+keyring = None
+if ALGORITHM in ASYMMETRIC_ALGORITHMS:
+    if not settings.JWT_KEYS_DIR:
+        raise RuntimeError(f"ALGORITHM={ALGORITHM} requires JWT_KEYS_DIR")
+    keyring = KeyRing(ALGORITHM, settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
+
 # 🔒 Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # ---------------------- Password Hashing ----------------------
 
+# 🧵 bcrypt (~200 ms of CPU, GIL released) never runs on the event loop
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0
+_hash_seconds_avg = 0.2  # moving average of one hash, used for Retry-After
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+async def _run_hashing(func, *args):
+    """Run ``func`` on the bcrypt pool, shedding load once the wait queue is full.
+
+    Callers beyond PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE get a 503 whose
+    Retry-After is the time the current backlog needs to drain.
+    """
+    global _hash_pending, _hash_seconds_avg
+    capacity = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+    if _hash_pending >= capacity:
+        drain_seconds = _hash_pending * _hash_seconds_avg / settings.PASSWORD_HASH_WORKERS
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, retry shortly",
+            headers={"Retry-After": str(max(1, math.ceil(drain_seconds)))},
+        )
+
+    _hash_pending += 1
+    try:
+        result, seconds = await asyncio.get_running_loop().run_in_executor(_hash_executor, _timed, func, *args)
+        _hash_seconds_avg = 0.9 * _hash_seconds_avg + 0.1 * seconds
+        return result
+    finally:
+        _hash_pending -= 1
+
 async def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return await _run_hashing(pwd_context.hash, password)
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _run_hashing(pwd_context.verify, plain_password, hashed_password)
 
 # ---------------------- JWT Token Handling ----------------------
 
@@ -29,12 +80,22 @@ async def create_access_token(data: dict, expires_delta: Union[timedelta, None]
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
+    if keyring:
+        return jwt.encode(to_encode, keyring.signing_key, algorithm=ALGORITHM, headers={"kid": keyring.active_kid})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _verification_key(token: str):
+    if not keyring:
+        return SECRET_KEY
+    key = keyring.verification_key(jwt.get_unverified_header(token).get("kid"))
+    if key is None:
+        raise JWTError("Unknown signing key")
+    return key
+
 async def decode_access_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, _verification_key(token), algorithms=[ALGORITHM])
         return payload
     except JWTError:
         raise HTTPException(
@@ -42,3 +103,42 @@ async def decode_access_token(token: str) -> dict:
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+# ---------------------- Refresh Tokens ----------------------
+
+def hash_refresh_token(token: str) -> bytes:
+    # refresh tokens are 256-bit random secrets, a plain sha256 is enough to store them
+    return hashlib.sha256(token.encode()).digest()
+
+def new_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+# ---------------------- Verified Token Cache ----------------------
+
+# sha256(token) -> Principal, bounded LRU; entries die with the token's exp
+_verified_tokens: "OrderedDict[bytes, schemas.Principal]" = OrderedDict()
+
+async def get_principal(token: str) -> schemas.Principal:
+    """Verify ``token`` and return its principal, decoding each distinct token only once."""
+    digest = hashlib.sha256(token.encode()).digest()
+    principal = _verified_tokens.get(digest)
+    if principal is not None:
+        if principal.exp > datetime.now(timezone.utc):
+            _verified_tokens.move_to_end(digest)
+            return principal
+        del _verified_tokens[digest]
+
+    payload = await decode_access_token(token)
+    try:
+        principal = schemas.Principal.model_validate(payload)
+    except ValidationError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    _verified_tokens[digest] = principal
+    if len(_verified_tokens) > settings.VERIFIED_TOKEN_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
+    return principal
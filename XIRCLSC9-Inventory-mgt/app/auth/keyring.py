@@ -0,0 +1,53 @@
+# app/auth/keyring.py
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+from jose import jwk
+from jose.backends.base import Key
+
+# 🔑 Algorithms verified with a public key (python-jose has no EdDSA support)
+ASYMMETRIC_ALGORITHMS = {"RS256", "RS384", "RS512", "ES256", "ES384", "ES512"}
+
+
+class KeyRing:
+    """In-memory set of signing keys addressed by ``kid``.
+
+    Every ``<kid>.pem`` file in ``keys_dir`` is loaded. Files holding a private key
+    can sign; public-only files keep verifying tokens issued by a retired key until
+    they expire. Rotate by dropping in a new key file (kids sort by name, the last
+    private key is active unless ``active_kid`` says otherwise) and reloading.
+    """
+
+    def __init__(self, algorithm: str, keys_dir: str, active_kid: Optional[str] = None):
+        self.algorithm = algorithm
+        self.keys_dir = keys_dir
+        self.requested_kid = active_kid
+        self.reload()
+
+    def reload(self):
+        signing_keys: Dict[str, Key] = {}
+        verification_keys: Dict[str, Key] = {}
+        jwks = []
+        for path in sorted(Path(self.keys_dir).glob("*.pem")):
+            kid = path.stem
+            key = jwk.construct(path.read_text(), self.algorithm)
+            public_key = key if key.is_public() else key.public_key()
+            if not key.is_public():
+                signing_keys[kid] = key
+            verification_keys[kid] = public_key
+            jwks.append({**public_key.to_dict(), "kid": kid, "use": "sig", "alg": self.algorithm})
+
+        active_kid = self.requested_kid or (list(signing_keys)[-1] if signing_keys else None)
+        if active_kid not in signing_keys:
+            raise RuntimeError(f"No private {self.algorithm} key found for kid {active_kid!r} in {self.keys_dir}")
+
+        self.active_kid = active_kid
+        self.signing_key = signing_keys[active_kid]
+        self.verification_keys = verification_keys
+        self.jwks_json = json.dumps({"keys": jwks}, separators=(",", ":")).encode()
+        self.jwks_etag = '"' + hashlib.sha256(self.jwks_json).hexdigest()[:32] + '"'
+
+    def verification_key(self, kid: Optional[str]) -> Optional[Key]:
+        return self.verification_keys.get(kid) if kid else None
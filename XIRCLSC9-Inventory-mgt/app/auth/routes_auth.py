@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app import models, schemas
+from app.auth import auth_handler
 from app.auth.auth_handler import (
     get_password_hash,
     verify_password,
-    create_access_token
+    create_access_token,
+    hash_refresh_token,
+    new_refresh_token,
 )
+from app import crud
+from datetime import datetime, timedelta
+from app.settings import settings
 from sqlalchemy.future import select
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
+well_known_router = APIRouter(prefix="/.well-known", tags=["Auth"])
 
 @router.post("/signup", response_model=schemas.User)
 async def signup(user_data: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
@@ -37,5 +44,56 @@ async def login(user_data: schemas.UserLogin, db: AsyncSession = Depends(get_db)
     if not user or not await verify_password(user_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
+    refresh_token = new_refresh_token()
+    await crud.create_refresh_token(
+        db, user_id=user.id, token_hash=hash_refresh_token(refresh_token), expires_at=_refresh_token_expiry()
+    )
+    return await _issue_tokens(user, refresh_token)
+
+
+# ♻️ Swap a refresh token for a new access + refresh pair (no bcrypt, one indexed lookup)
+@router.post("/refresh", response_model=schemas.Token)
+async def refresh(request_data: schemas.RefreshRequest, db: AsyncSession = Depends(get_db)):
+    refresh_token = new_refresh_token()
+    user = await crud.rotate_refresh_token(
+        db,
+        token_hash=hash_refresh_token(request_data.refresh_token),
+        new_token_hash=hash_refresh_token(refresh_token),
+        expires_at=_refresh_token_expiry(),
+    )
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    return await _issue_tokens(user, refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request_data: schemas.RefreshRequest, db: AsyncSession = Depends(get_db)):
+    await crud.revoke_refresh_token_family(db, hash_refresh_token(request_data.refresh_token))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+def _refresh_token_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+async def _issue_tokens(user: models.User, refresh_token: str) -> dict:
     token = await create_access_token({"sub": user.username, "role": user.role})
-    return {"access_token": token, "token_type": "bearer"}
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+    }
+
+
+# 🔑 Public keys so other services verify tokens locally
+@well_known_router.get("/jwks.json")
+async def jwks(request: Request):
+    keyring = auth_handler.keyring
+    body, etag = (keyring.jwks_json, keyring.jwks_etag) if keyring else (b'{"keys":[]}', '"empty"')
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+        "ETag": etag,
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
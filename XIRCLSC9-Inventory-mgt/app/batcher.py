@@ -0,0 +1,144 @@
+# app/batcher.py
+
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from app import crud, database, schemas
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MovementBatcher:
+    """Write-behind queue for stock movements (POST /inventory/items/{id}/movements?queued=true).
+
+    Movements are collected for up to ``max_delay`` seconds or ``max_events``
+    events, whichever comes first, and written by crud.apply_stock_movements in
+    a single transaction. While one batch is being written the next one keeps
+    filling, so batches grow with load.
+
+    ``ack="committed"`` makes submit() wait for the batch COMMIT and return the
+    movement (or raise); ``ack="accepted"`` returns as soon as the movement is
+    queued, and rejected movements are only counted and logged.
+    """
+
+    def __init__(self, max_events: int, max_delay: float, queue_size: int, ack: str, synchronous_commit: bool):
+        self.max_events = max_events
+        self.max_delay = max_delay
+        self.ack = ack
+        self.synchronous_commit = synchronous_commit
+        self.queue_size = queue_size
+        self._queue: "Optional[asyncio.Queue[Tuple[int, schemas.StockMovementCreate, Optional[asyncio.Future]]]]" = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.events = 0
+        self.rejected = 0
+        self.failed = 0
+
+    async def start(self):
+        if self._task is None:
+            # created here, on the running loop, so the batcher can be restarted on another one
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write everything still queued, then stop the flusher."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, item_id: int, movement: schemas.StockMovementCreate):
+        """Queue a movement; waits for a free slot when the queue is full (backpressure)."""
+        if self._task is None:
+            raise RuntimeError("MovementBatcher is not running")
+        future = asyncio.get_running_loop().create_future() if self.ack == "committed" else None
+        await self._queue.put((item_id, movement, future))
+        if future is None:
+            return None
+        return await future
+
+    async def _next_batch(self) -> List:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_events:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List):
+        movements = [(item_id, movement) for item_id, movement, _ in batch]
+        try:
+            async with database.AsyncSessionLocal() as session:
+                outcomes = await crud.apply_stock_movements(
+                    session, movements, synchronous_commit=self.synchronous_commit
+                )
+        except Exception as exc:
+            self.failed += len(batch)
+            logger.exception("Stock movement batch of %d events failed", len(batch))
+            for _, _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.events += len(batch)
+        for (item_id, _, future), outcome in zip(batch, outcomes):
+            if not isinstance(outcome, dict):
+                self.rejected += 1
+                if future is None:
+                    logger.warning("Queued movement for item %s rejected: %s", item_id, outcome or "item not found")
+            if future is None or future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "ack": self.ack,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "events": self.events,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "avg_batch_size": round(self.events / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+# 📥 One batcher per worker process, started and drained by app.main
+movement_batcher = MovementBatcher(
+    max_events=settings.MOVEMENT_BATCH_MAX_EVENTS,
+    max_delay=settings.MOVEMENT_BATCH_MAX_DELAY_MS / 1000,
+    queue_size=settings.MOVEMENT_QUEUE_SIZE,
+    ack=settings.MOVEMENT_ACK,
+    synchronous_commit=settings.MOVEMENT_SYNCHRONOUS_COMMIT,
+)
@@ -0,0 +1,116 @@
+# app/cache.py
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from app.settings import settings
+
+# --------------------------------------
+# BACKENDS
+# --------------------------------------
+class MemoryCache:
+    """In-process TTL + LRU cache. Each worker keeps its own copy."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, prefix: str):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+
+class RedisCache:
+    """Shared cache for all workers, speaking the Redis protocol.
+
+    Works against a local ``redis-server`` or any RESP-compatible stand-in
+    (KeyDB, Dragonfly, ...). Needs the optional ``redis`` package.
+    """
+
+    def __init__(self, url: str, namespace: str = "inventory:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        self._client = redis.from_url(url)
+        self.namespace = namespace
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(self.namespace + key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: int):
+        await self._client.set(self.namespace + key, json.dumps(value), ex=ttl)
+
+    async def invalidate(self, prefix: str):
+        keys = [key async for key in self._client.scan_iter(match=f"{self.namespace}{prefix}*")]
+        if keys:
+            await self._client.unlink(*keys)
+
+# --------------------------------------
+# READ-THROUGH FRONT
+# --------------------------------------
+class ReadThroughCache:
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key`` or call ``loader`` and cache its result.
+
+        Values must be JSON-serialisable; None (not found) is never cached.
+        """
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            await self.backend.set(key, value, self.ttl)
+        return value
+
+    async def invalidate(self, prefix: str):
+        self.invalidations += 1
+        await self.backend.invalidate(prefix)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+def build_cache() -> ReadThroughCache:
+    if settings.CACHE_BACKEND == "redis":
+        backend = RedisCache(settings.CACHE_URL or "redis://localhost:6379/0")
+    else:
+        backend = MemoryCache(settings.CACHE_MAX_ENTRIES)
+    return ReadThroughCache(backend, ttl=settings.CACHE_TTL_SECONDS)
+
+# 📦 Reference-data cache (categories, suppliers)
+cache = build_cache()
@@ -1,43 +1,101 @@
 # app/crud.py
+import os
+from datetime import date, datetime, time, timezone
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import Date, DateTime, Float, Integer, Text, case, cast, func, insert, literal, literal_column, or_, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app import models, schemas
+from sqlalchemy.orm import joinedload
+from app import events, models, schemas
+from app.cache import cache
+from app.pagination import apply_order, keyset_page
+
+# Columns the list endpoints may sort by; every ordering is tie-broken on id
+CATEGORY_SORT_COLUMNS = {"id": models.Category.id, "name": models.Category.name}
+SUPPLIER_SORT_COLUMNS = {"id": models.Supplier.id, "name": models.Supplier.name}
+ITEM_SORT_COLUMNS = {
+    "id": models.Item.id,
+    "name": models.Item.name,
+    "quantity": models.Item.quantity,
+    "price": models.Item.price,
+    "updated_at": models.Item.updated_at,
+}
+STOCK_TRANSACTION_SORT_COLUMNS = {"id": models.StockTransaction.id, "timestamp": models.StockTransaction.timestamp}
+
+def _dump(schema, obj):
+    return schema.model_validate(obj).model_dump(mode="json")
 
 # --------------------------------------
-# CATEGORY CRUD OPERATIONS
+# CATEGORY CRUD OPERATIONS (read-through cached)
 # --------------------------------------
 async def create_category(db: AsyncSession, category: schemas.CategoryCreate):
     db_category = models.Category(**category.dict())
     db.add(db_category)
     await db.commit()
     await db.refresh(db_category)
+    await cache.invalidate("categories:")
+    events.publish_change("category.created", _dump(schemas.Category, db_category))
     return db_category
 
 async def get_category(db: AsyncSession, category_id: int):
-    result = await db.execute(select(models.Category).filter(models.Category.id == category_id))
-    return result.scalar_one_or_none()
+    async def load():
+        result = await db.execute(select(models.Category).filter(models.Category.id == category_id))
+        category = result.scalar_one_or_none()
+        return None if category is None else _dump(schemas.Category, category)
+    return await cache.get_or_load(f"categories:{category_id}", load)
 
-async def get_categories(db: AsyncSession, skip: int = 0, limit: int = 100):
-    result = await db.execute(select(models.Category).offset(skip).limit(limit))
-    return result.scalars().all()
+async def get_categories(db: AsyncSession, skip: int = 0, limit: int = 100, sort: str = "id", descending: bool = False):
+    async def load():
+        stmt = apply_order(select(models.Category), CATEGORY_SORT_COLUMNS[sort], models.Category.id, descending)
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return [_dump(schemas.Category, category) for category in result.scalars()]
+    return await cache.get_or_load(f"categories:list:{skip}:{limit}:{sort}:{descending}", load)
+
+async def get_categories_page(db: AsyncSession, cursor: str = "", limit: int = 100, sort: str = "id", descending: bool = False):
+    async def load():
+        categories, next_cursor = await keyset_page(
+            db, select(models.Category), CATEGORY_SORT_COLUMNS[sort], models.Category.id,
+            sort=sort, cursor=cursor, limit=limit, descending=descending,
+        )
+        return [[_dump(schemas.Category, category) for category in categories], next_cursor]
+    return await cache.get_or_load(f"categories:page:{cursor}:{limit}:{sort}:{descending}", load)
 
 # --------------------------------------
-# SUPPLIER CRUD OPERATIONS
+# SUPPLIER CRUD OPERATIONS (read-through cached)
 # --------------------------------------
 async def create_supplier(db: AsyncSession, supplier: schemas.SupplierCreate):
     db_supplier = models.Supplier(**supplier.dict())
     db.add(db_supplier)
     await db.commit()
     await db.refresh(db_supplier)
+    await cache.invalidate("suppliers:")
+    events.publish_change("supplier.created", _dump(schemas.Supplier, db_supplier))
     return db_supplier
 
 async def get_supplier(db: AsyncSession, supplier_id: int):
-    result = await db.execute(select(models.Supplier).filter(models.Supplier.id == supplier_id))
-    return result.scalar_one_or_none()
+    async def load():
+        result = await db.execute(select(models.Supplier).filter(models.Supplier.id == supplier_id))
+        supplier = result.scalar_one_or_none()
+        return None if supplier is None else _dump(schemas.Supplier, supplier)
+    return await cache.get_or_load(f"suppliers:{supplier_id}", load)
 
-async def get_suppliers(db: AsyncSession, skip: int = 0, limit: int = 100):
-    result = await db.execute(select(models.Supplier).offset(skip).limit(limit))
-    return result.scalars().all()
+async def get_suppliers(db: AsyncSession, skip: int = 0, limit: int = 100, sort: str = "id", descending: bool = False):
+    async def load():
+        stmt = apply_order(select(models.Supplier), SUPPLIER_SORT_COLUMNS[sort], models.Supplier.id, descending)
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return [_dump(schemas.Supplier, supplier) for supplier in result.scalars()]
+    return await cache.get_or_load(f"suppliers:list:{skip}:{limit}:{sort}:{descending}", load)
+
+async def get_suppliers_page(db: AsyncSession, cursor: str = "", limit: int = 100, sort: str = "id", descending: bool = False):
+    async def load():
+        suppliers, next_cursor = await keyset_page(
+            db, select(models.Supplier), SUPPLIER_SORT_COLUMNS[sort], models.Supplier.id,
+            sort=sort, cursor=cursor, limit=limit, descending=descending,
+        )
+        return [[_dump(schemas.Supplier, supplier) for supplier in suppliers], next_cursor]
+    return await cache.get_or_load(f"suppliers:page:{cursor}:{limit}:{sort}:{descending}", load)
 
 # --------------------------------------
 # ITEM CRUD OPERATIONS
@@ -45,37 +103,406 @@ async def get_suppliers(db: AsyncSession, skip: int = 0, limit: int = 100):
 async def create_item(db: AsyncSession, item: schemas.ItemCreate):
     db_item = models.Item(**item.dict())
     db.add(db_item)
+    await db.flush()
+    await snapshot_items(db, [db_item.id], datetime.utcnow())
     await db.commit()
     await db.refresh(db_item)
+    events.publish_change("item.created", _dump(schemas.Item, db_item))
     return db_item
 
-async def get_item(db: AsyncSession, item_id: int):
-    result = await db.execute(select(models.Item).filter(models.Item.id == item_id))
+# Columns overwritten when a bulk row hits an existing (name, supplier_id)
+ITEM_UPSERT_COLUMNS = ("description", "quantity", "price", "category_id")
+
+async def _upsert_items(db: AsyncSession, rows: List[Tuple[int, schemas.ItemCreate]], on_conflict: str, now: datetime):
+    stmt = pg_insert(models.Item).values(
+        [{**item.dict(), "created_at": now, "updated_at": now} for _, item in rows]
+    )
+    if on_conflict == "update":
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_items_name_supplier",
+            set_={**{column: stmt.excluded[column] for column in ITEM_UPSERT_COLUMNS}, "updated_at": now},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_items_name_supplier")
+    stmt = stmt.returning(
+        models.Item.id, models.Item.name, models.Item.supplier_id,
+        literal_column("xmax = 0").label("inserted"),
+    )
+    result = await db.execute(stmt)
+    written = {(row.name, row.supplier_id): row for row in result}
+    await snapshot_items(db, [row.id for row in written.values()], now)
+
+    results = []
+    for index, item in rows:
+        row = written.get((item.name, item.supplier_id))
+        if row is None:
+            results.append({"index": index, "status": "skipped", "error": "Item already exists"})
+        else:
+            results.append({"index": index, "status": "created" if row.inserted else "updated", "id": row.id})
+    return results
+
+async def upsert_item_chunk(db: AsyncSession, rows: List[Tuple[int, schemas.ItemCreate]], on_conflict: str = "update"):
+    """Write one chunk of validated bulk rows with a single multi-row INSERT ... ON CONFLICT.
+
+    The caller owns the transaction and commits once after the last chunk.
+    Each chunk runs in a SAVEPOINT; if the database rejects it (e.g. an unknown
+    category_id) the chunk is replayed row by row so only the offending rows fail.
+    """
+    now = datetime.utcnow()
+    # Postgres refuses to touch the same row twice in one statement: last row wins
+    latest = {}
+    results = []
+    for index, item in rows:
+        key = (item.name, item.supplier_id)
+        if key in latest:
+            results.append({"index": latest[key][0], "status": "skipped", "error": f"Superseded by row {index}"})
+        latest[key] = (index, item)
+    rows = list(latest.values())
+
+    try:
+        async with db.begin_nested():
+            return results + await _upsert_items(db, rows, on_conflict, now)
+    except DBAPIError:
+        pass
+
+    for index, item in rows:
+        try:
+            async with db.begin_nested():
+                results += await _upsert_items(db, [(index, item)], on_conflict, now)
+        except DBAPIError as exc:
+            results.append({"index": index, "status": "error", "error": str(exc.orig)})
+    return results
+
+# Relationships that ?expand= may load alongside items
+ITEM_EXPANDABLE = {"category": models.Item.category, "supplier": models.Item.supplier}
+
+def _select_items(expand: Sequence[str] = ()):
+    # many-to-one: a LEFT OUTER JOIN in the same statement, however long the page
+    return select(models.Item).options(*(joinedload(ITEM_EXPANDABLE[name]) for name in expand))
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _filter_items(stmt, filters: Optional[schemas.ItemFilter]):
+    if filters is None:
+        return stmt
+    if filters.category_id is not None:
+        stmt = stmt.filter(models.Item.category_id == filters.category_id)
+    if filters.supplier_id is not None:
+        stmt = stmt.filter(models.Item.supplier_id == filters.supplier_id)
+    if filters.min_price is not None:
+        stmt = stmt.filter(models.Item.price >= filters.min_price)
+    if filters.max_price is not None:
+        stmt = stmt.filter(models.Item.price <= filters.max_price)
+    if filters.low_stock_threshold is not None:
+        stmt = stmt.filter(models.Item.quantity < filters.low_stock_threshold)
+    if filters.name_prefix:
+        # matches the lower(name) text_pattern_ops index
+        pattern = _escape_like(filters.name_prefix.lower()) + "%"
+        stmt = stmt.filter(func.lower(models.Item.name).like(pattern, escape="\\"))
+    return stmt
+
+async def get_item(db: AsyncSession, item_id: int, expand: Sequence[str] = ()):
+    result = await db.execute(_select_items(expand).filter(models.Item.id == item_id))
     return result.scalar_one_or_none()
 
-async def get_items(db: AsyncSession, skip: int = 0, limit: int = 100):
-    result = await db.execute(select(models.Item).offset(skip).limit(limit))
+async def get_items(
+    db: AsyncSession, skip: int = 0, limit: int = 100, sort: str = "id", descending: bool = False,
+    expand: Sequence[str] = (), filters: Optional[schemas.ItemFilter] = None,
+):
+    stmt = _filter_items(_select_items(expand), filters)
+    stmt = apply_order(stmt, ITEM_SORT_COLUMNS[sort], models.Item.id, descending)
+    result = await db.execute(stmt.offset(skip).limit(limit))
     return result.scalars().all()
 
+async def get_items_page(
+    db: AsyncSession, cursor: str = "", limit: int = 100, sort: str = "id", descending: bool = False,
+    expand: Sequence[str] = (), filters: Optional[schemas.ItemFilter] = None,
+):
+    return await keyset_page(
+        db, _filter_items(_select_items(expand), filters), ITEM_SORT_COLUMNS[sort], models.Item.id,
+        sort=sort, cursor=cursor, limit=limit, descending=descending,
+    )
+
 async def update_item(db: AsyncSession, item_id: int, item_update: schemas.ItemCreate):
     result = await db.execute(select(models.Item).filter(models.Item.id == item_id))
     db_item = result.scalar_one_or_none()
     if db_item:
+        quantity_before, threshold_before = db_item.quantity, db_item.reorder_threshold
         update_data = item_update.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_item, key, value)
+        await db.flush()
+        await snapshot_items(db, [item_id], datetime.utcnow())
         await db.commit()
         await db.refresh(db_item)
+        events.publish_change("item.updated", _dump(schemas.Item, db_item))
+        events.check_reorder_crossing(
+            item_id, db_item.name, quantity_before, db_item.quantity, threshold_before, db_item.reorder_threshold
+        )
     return db_item
 
+class ItemHasHistoryError(ValueError):
+    pass
+
 async def delete_item(db: AsyncSession, item_id: int):
     result = await db.execute(select(models.Item).filter(models.Item.id == item_id))
     db_item = result.scalar_one_or_none()
     if db_item:
         await db.delete(db_item)
-        await db.commit()
+        try:
+            await db.commit()
+        except IntegrityError:
+            # stock_transactions.item_id is ON DELETE RESTRICT: the ledger keeps its items
+            await db.rollback()
+            raise ItemHasHistoryError(f"Item {item_id} has stock transactions and cannot be deleted")
+        events.publish_change("item.deleted", {"id": item_id})
     return db_item
 
+# --------------------------------------
+# INVENTORY STATS (aggregated in SQL)
+# --------------------------------------
+def _item_value():
+    return models.Item.quantity * models.Item.price
+
+def _is_low_stock(default_threshold: int):
+    # an item's own reorder_threshold wins over the request-wide default
+    return models.Item.quantity < func.coalesce(models.Item.reorder_threshold, default_threshold)
+
+def _stats_columns(low_stock_threshold: int):
+    return (
+        func.count(models.Item.id).label("total_items"),
+        func.coalesce(func.sum(models.Item.quantity), 0).label("total_stock"),
+        func.coalesce(func.sum(_item_value()), 0).label("total_value"),
+        func.count(models.Item.id).filter(_is_low_stock(low_stock_threshold)).label("low_stock_items"),
+    )
+
+async def get_inventory_stats(db: AsyncSession, low_stock_threshold: int = 10):
+    result = await db.execute(select(*_stats_columns(low_stock_threshold)))
+    stats = dict(result.one()._mapping)
+    stats["low_stock_threshold"] = low_stock_threshold
+    return stats
+
+async def get_category_stats(db: AsyncSession, low_stock_threshold: int = 10):
+    result = await db.execute(
+        select(models.Category.id, models.Category.name, *_stats_columns(low_stock_threshold))
+        .outerjoin(models.Item, models.Item.category_id == models.Category.id)
+        .group_by(models.Category.id, models.Category.name)
+        .order_by(models.Category.id)
+    )
+    return [dict(row._mapping) for row in result]
+
+async def get_supplier_stats(db: AsyncSession, low_stock_threshold: int = 10):
+    result = await db.execute(
+        select(models.Supplier.id, models.Supplier.name, *_stats_columns(low_stock_threshold))
+        .outerjoin(models.Item, models.Item.supplier_id == models.Supplier.id)
+        .group_by(models.Supplier.id, models.Supplier.name)
+        .order_by(models.Supplier.id)
+    )
+    return [dict(row._mapping) for row in result]
+
+async def get_top_items(db: AsyncSession, by: str = "quantity", limit: int = 10):
+    order_column = _item_value() if by == "value" else models.Item.quantity
+    result = await db.execute(
+        select(
+            models.Item.id, models.Item.name, models.Item.quantity, models.Item.price,
+            _item_value().label("total_value"),
+        )
+        .order_by(order_column.desc(), models.Item.id)
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in result]
+
+async def get_low_stock_items(db: AsyncSession, low_stock_threshold: int = 10, limit: int = 100):
+    result = await db.execute(
+        select(
+            models.Item.id, models.Item.name, models.Item.quantity, models.Item.price,
+            _item_value().label("total_value"),
+        )
+        .filter(_is_low_stock(low_stock_threshold))
+        .order_by(models.Item.quantity, models.Item.id)
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in result]
+
+async def get_valuation_stats(db: AsyncSession, buckets: int = 20):
+    """Totals, value percentiles and quantity/value histograms for the reports page."""
+    value = _item_value()
+    result = await db.execute(
+        select(
+            func.count(models.Item.id).label("total_items"),
+            func.coalesce(func.sum(models.Item.quantity), 0).label("total_stock"),
+            func.coalesce(func.sum(value), 0).label("total_value"),
+            func.coalesce(func.avg(models.Item.price), 0).label("average_price"),
+            func.coalesce(func.avg(models.Item.quantity), 0).label("average_quantity"),
+            func.coalesce(func.percentile_cont(0.5).within_group(value), 0).label("value_p50"),
+            func.coalesce(func.percentile_cont(0.9).within_group(value), 0).label("value_p90"),
+            func.coalesce(func.percentile_cont(0.99).within_group(value), 0).label("value_p99"),
+            func.min(models.Item.quantity).label("min_quantity"),
+            func.max(models.Item.quantity).label("max_quantity"),
+            func.min(value).label("min_value"),
+            func.max(value).label("max_value"),
+        )
+    )
+    stats = dict(result.one()._mapping)
+    stats["quantity_histogram"] = await _histogram(
+        db, models.Item.quantity, stats.pop("min_quantity"), stats.pop("max_quantity"), buckets
+    )
+    stats["value_histogram"] = await _histogram(db, value, stats.pop("min_value"), stats.pop("max_value"), buckets)
+    return stats
+
+async def _histogram(db: AsyncSession, column, low, high, buckets: int):
+    if low is None:
+        return []
+    if low == high:
+        count = await db.scalar(select(func.count()).select_from(models.Item))
+        return [{"lower": low, "upper": high, "count": count}]
+    width = (high - low) / buckets
+    # width_bucket puts the maximum itself in bucket n + 1; fold it into the last one
+    bucket = func.least(func.width_bucket(cast(column, Float), float(low), float(high), buckets), buckets)
+    result = await db.execute(select(bucket.label("bucket"), func.count()).group_by(bucket).order_by(bucket))
+    return [
+        {"lower": low + (index - 1) * width, "upper": low + index * width, "count": count}
+        for index, count in result
+    ]
+
+# --------------------------------------
+# STOCK SNAPSHOTS (closing stock per item per day)
+# --------------------------------------
+# Rebuilds every snapshot from the ledger, valued at the current price. Each
+# item's opening stock is its current quantity minus the ledger's net movement,
+# so items that started above zero (or whose early rows were archived) still
+# close at today's quantity. Edits that bypassed the ledger count as opening stock.
+REBUILD_STOCK_SNAPSHOTS_SQL = """
+INSERT INTO stock_snapshots (item_id, day, quantity, value)
+SELECT daily.item_id, daily.day,
+       items.quantity - daily.net + daily.running,
+       (items.quantity - daily.net + daily.running) * items.price
+FROM (
+    SELECT item_id, day,
+           sum(delta) OVER (PARTITION BY item_id ORDER BY day) AS running,
+           sum(delta) OVER (PARTITION BY item_id) AS net
+    FROM (
+        SELECT item_id, CAST(timestamp AS date) AS day,
+               sum(CASE WHEN change_type = 'remove' THEN -quantity ELSE quantity END) AS delta
+        FROM stock_transactions
+        GROUP BY item_id, CAST(timestamp AS date)
+    ) AS deltas
+) AS daily
+JOIN items ON items.id = daily.item_id
+ON CONFLICT (item_id, day) DO UPDATE SET quantity = excluded.quantity, value = excluded.value
+"""
+
+def _ledger_delta():
+    # SQL twin of stock_delta()
+    ledger = models.StockTransaction
+    return case((ledger.change_type == "remove", -ledger.quantity), else_=ledger.quantity)
+
+def naive_utc(at: datetime) -> datetime:
+    # the ledger stores naive UTC timestamps
+    return at.astimezone(timezone.utc).replace(tzinfo=None) if at.tzinfo else at
+
+def _upsert_snapshots(rows):
+    """INSERT ... ON CONFLICT for a SELECT of (item_id, day, quantity, value)."""
+    stmt = pg_insert(models.StockSnapshot).from_select(["item_id", "day", "quantity", "value"], rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[models.StockSnapshot.item_id, models.StockSnapshot.day],
+        set_={"quantity": stmt.excluded.quantity, "value": stmt.excluded.value},
+    )
+
+async def snapshot_items(db: AsyncSession, item_ids: Sequence[int], now: datetime):
+    """Write today's snapshot for items changed outside the movement path (create, update, bulk)."""
+    if not item_ids:
+        return
+    await db.execute(_upsert_snapshots(
+        select(models.Item.id, literal(now.date(), Date), models.Item.quantity, _item_value())
+        .filter(models.Item.id.in_(item_ids))
+    ))
+
+async def rebuild_stock_snapshots(db: AsyncSession):
+    await db.execute(text(REBUILD_STOCK_SNAPSHOTS_SQL))
+    await db.commit()
+
+def _stock_as_of(at: datetime, item_id: Optional[int] = None):
+    """Per-item (item_id, name, quantity, value) at ``at``.
+
+    Starts from each item's closing snapshot of the last day before ``at`` and
+    adds the ledger rows written between midnight and ``at``, so only one day of
+    history is ever replayed. Edits that bypass the ledger (PUT, bulk upserts)
+    show up from the end of their day on.
+    """
+    snapshot = models.StockSnapshot
+    ledger = models.StockTransaction
+    base = (
+        select(snapshot.item_id, snapshot.quantity, snapshot.value)
+        .filter(snapshot.day < at.date())
+        .distinct(snapshot.item_id)
+        .order_by(snapshot.item_id, snapshot.day.desc())
+    )
+    tail = (
+        select(ledger.item_id, func.sum(_ledger_delta()).label("delta"))
+        .filter(ledger.timestamp >= datetime.combine(at.date(), time.min), ledger.timestamp <= at)
+        .group_by(ledger.item_id)
+    )
+    if item_id is not None:
+        base = base.filter(snapshot.item_id == item_id)
+        tail = tail.filter(ledger.item_id == item_id)
+    base = base.subquery("base")
+    tail = tail.subquery("tail")
+
+    delta = func.coalesce(tail.c.delta, 0)
+    return (
+        select(
+            models.Item.id.label("item_id"),
+            models.Item.name,
+            (func.coalesce(base.c.quantity, 0) + delta).label("quantity"),
+            (func.coalesce(base.c.value, 0) + delta * models.Item.price).label("value"),
+        )
+        .outerjoin(base, base.c.item_id == models.Item.id)
+        .outerjoin(tail, tail.c.item_id == models.Item.id)
+        .filter(or_(base.c.item_id.is_not(None), tail.c.item_id.is_not(None)))
+    )
+
+async def get_stock_totals_as_of(db: AsyncSession, at: datetime):
+    at = naive_utc(at)
+    stock = _stock_as_of(at).subquery()
+    result = await db.execute(
+        select(
+            func.count(stock.c.item_id).label("total_items"),
+            func.coalesce(func.sum(stock.c.quantity), 0).label("total_stock"),
+            func.coalesce(func.sum(stock.c.value), 0).label("total_value"),
+        )
+    )
+    return {"at": at, **result.one()._mapping}
+
+async def get_item_stock_as_of(db: AsyncSession, item_id: int, at: datetime):
+    at = naive_utc(at)
+    result = await db.execute(_stock_as_of(at, item_id))
+    row = result.one_or_none()
+    return None if row is None else {"at": at, **row._mapping}
+
+async def get_stock_history(db: AsyncSession, item_id: int, start: date, end: date):
+    """Daily snapshots of one item in [start, end], led by the last one before ``start``.
+
+    Only days on which the item changed have a row; stock carries over between them.
+    """
+    snapshot = models.StockSnapshot
+    opening_day = (
+        select(func.max(snapshot.day))
+        .filter(snapshot.item_id == item_id, snapshot.day <= start)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(snapshot)
+        .filter(
+            snapshot.item_id == item_id,
+            snapshot.day <= end,
+            or_(snapshot.day >= start, snapshot.day == opening_day),
+        )
+        .order_by(snapshot.day)
+    )
+    return result.scalars().all()
+
 # --------------------------------------
 # USER CRUD OPERATIONS
 # --------------------------------------
@@ -94,6 +521,65 @@ async def get_user(db: AsyncSession, user_id: int):
     result = await db.execute(select(models.User).filter(models.User.id == user_id))
     return result.scalar_one_or_none()
 
+# --------------------------------------
+# REFRESH TOKEN OPERATIONS
+# --------------------------------------
+async def create_refresh_token(
+    db: AsyncSession, user_id: int, token_hash: bytes, expires_at: datetime, family_id: Optional[bytes] = None
+):
+    db.add(models.RefreshToken(
+        token_hash=token_hash,
+        family_id=family_id or os.urandom(16),
+        user_id=user_id,
+        expires_at=expires_at,
+    ))
+    await db.commit()
+
+async def rotate_refresh_token(db: AsyncSession, token_hash: bytes, new_token_hash: bytes, expires_at: datetime):
+    """Swap a live refresh token for a new one in the same family and return its user.
+
+    The old token is revoked with a conditional UPDATE, so two concurrent refreshes
+    with the same token cannot both succeed. Presenting a token that was already
+    rotated means it leaked: the whole family is revoked and None is returned.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(models.RefreshToken)
+        .where(
+            models.RefreshToken.token_hash == token_hash,
+            models.RefreshToken.revoked_at.is_(None),
+            models.RefreshToken.expires_at > now,
+        )
+        .values(revoked_at=now)
+        .returning(models.RefreshToken.user_id, models.RefreshToken.family_id)
+    )
+    revoked = result.one_or_none()
+    if revoked is None:
+        await revoke_refresh_token_family(db, token_hash)
+        return None
+
+    user = await get_user(db, revoked.user_id)
+    if user is None:
+        await db.commit()
+        return None
+    db.add(models.RefreshToken(
+        token_hash=new_token_hash,
+        family_id=revoked.family_id,
+        user_id=revoked.user_id,
+        expires_at=expires_at,
+    ))
+    await db.commit()
+    return user
+
+async def revoke_refresh_token_family(db: AsyncSession, token_hash: bytes):
+    family = select(models.RefreshToken.family_id).filter(models.RefreshToken.token_hash == token_hash)
+    await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.family_id.in_(family), models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    await db.commit()
+
 # --------------------------------------
 # STOCK TRANSACTION CRUD OPERATIONS
 # --------------------------------------
@@ -104,15 +590,250 @@ async def create_stock_transaction(db: AsyncSession, transaction: schemas.StockT
     await db.refresh(db_transaction)
     return db_transaction
 
+class StockMovementError(ValueError):
+    """A movement that cannot be applied; nothing was written."""
+
+class InsufficientStockError(StockMovementError):
+    pass
+
+class StockLimitError(StockMovementError):
+    pass
+
+class UnknownUserError(StockMovementError):
+    pass
+
+def stock_delta(change_type: str, quantity: int) -> int:
+    """Signed change in Item.quantity for a ledger row (remove rows store a positive quantity)."""
+    return -quantity if change_type == "remove" else quantity
+
+async def apply_stock_movement(db: AsyncSession, item_id: int, movement: schemas.StockMovementCreate):
+    """Move stock and write the ledger row in one statement and one transaction.
+
+    ``UPDATE items SET quantity = quantity + delta ... RETURNING`` feeds the
+    ``INSERT INTO stock_transactions`` and the upsert of today's stock snapshot
+    through CTEs, so the row lock on the item is held for a single round trip
+    plus COMMIT and concurrent movements can never lose updates. Returns None if
+    the item does not exist; raises InsufficientStockError / StockLimitError if
+    the movement would take stock out of range and UnknownUserError for a
+    user_id that does not exist (caught from the foreign key, not looked up).
+    """
+    delta = stock_delta(movement.change_type, movement.quantity)
+    now = datetime.utcnow()
+    ledger = models.StockTransaction.__table__
+
+    updated_item = (
+        update(models.Item)
+        .where(
+            models.Item.id == item_id,
+            models.Item.quantity + delta >= 0,
+            models.Item.quantity + delta <= schemas.MAX_STOCK_QUANTITY,
+        )
+        .values(quantity=models.Item.quantity + delta, updated_at=now)
+        .returning(
+            models.Item.id, models.Item.name, models.Item.quantity, models.Item.price, models.Item.reorder_threshold
+        )
+        .cte("updated_item")
+    )
+    upserted_snapshot = _upsert_snapshots(
+        select(
+            updated_item.c.id,
+            literal(now.date(), Date),
+            updated_item.c.quantity,
+            updated_item.c.quantity * updated_item.c.price,
+        )
+    ).cte("upserted_snapshot")
+    inserted = (
+        insert(ledger)
+        .from_select(
+            ["item_id", "change_type", "quantity", "user_id", "timestamp", "notes"],
+            select(
+                updated_item.c.id,
+                literal(movement.change_type),
+                literal(movement.quantity),
+                literal(movement.user_id, Integer),
+                literal(now, DateTime),
+                literal(movement.notes, Text),
+            ),
+        )
+        .returning(*ledger.c)
+        .cte("inserted_transaction")
+    )
+    try:
+        result = await db.execute(
+            select(
+                inserted,
+                updated_item.c.quantity.label("balance"),
+                updated_item.c.name.label("item_name"),
+                updated_item.c.reorder_threshold,
+            )
+            .join(updated_item, updated_item.c.id == inserted.c.item_id)
+            # not referenced by the SELECT, but Postgres runs every data-modifying CTE
+            .add_cte(upserted_snapshot)
+        )
+    except IntegrityError:
+        # the only foreign key the statement can break is stock_transactions.user_id
+        await db.rollback()
+        raise UnknownUserError(f"User {movement.user_id} does not exist")
+    row = result.one_or_none()
+    await db.commit()
+
+    if row is None:
+        if await get_item(db, item_id) is None:
+            return None
+        # a removal can only fail the lower bound, an addition only the upper one
+        if delta < 0:
+            raise InsufficientStockError("Movement would take stock below zero")
+        raise StockLimitError(f"Movement would take stock above {schemas.MAX_STOCK_QUANTITY}")
+    movement_row = dict(row._mapping)
+    threshold = movement_row.pop("reorder_threshold")
+    item_name = movement_row.pop("item_name")
+    events.publish_change("stock.movement", _dump(schemas.StockMovement, movement_row))
+    events.check_reorder_crossing(
+        item_id, item_name, row.balance - delta, row.balance, threshold, threshold
+    )
+    return movement_row
+
+def _plan_movements(movements, balances, now: datetime):
+    """Apply movements to ``balances`` (updated in place) in arrival order.
+
+    Returns one outcome per movement: a (ledger row, balance) pair, None for an
+    unknown item, or the StockMovementError that rejects it.
+    """
+    outcomes = []
+    for item_id, movement in movements:
+        if item_id not in balances:
+            outcomes.append(None)
+            continue
+        balance = balances[item_id] + stock_delta(movement.change_type, movement.quantity)
+        if balance < 0:
+            outcomes.append(InsufficientStockError("Movement would take stock below zero"))
+            continue
+        if balance > schemas.MAX_STOCK_QUANTITY:
+            outcomes.append(StockLimitError(f"Movement would take stock above {schemas.MAX_STOCK_QUANTITY}"))
+            continue
+        balances[item_id] = balance
+        row = {
+            "item_id": item_id,
+            "change_type": movement.change_type,
+            "quantity": movement.quantity,
+            "user_id": movement.user_id,
+            "timestamp": now,
+            "notes": movement.notes,
+        }
+        outcomes.append((row, balance))
+    return outcomes
+
+async def _write_movements(db: AsyncSession, planned, now: datetime):
+    """Write each item's last balance and the ledger rows of (row, balance) pairs; sets row["id"]."""
+    ledger = models.StockTransaction.__table__
+    final = {row["item_id"]: balance for row, balance in planned}
+    await db.execute(
+        update(models.Item),
+        [{"id": item_id, "quantity": balance, "updated_at": now} for item_id, balance in sorted(final.items())],
+    )
+    inserted = await db.execute(
+        insert(ledger).returning(ledger.c.id, sort_by_parameter_order=True), [row for row, _ in planned]
+    )
+    for (row, _), transaction_id in zip(planned, inserted.scalars()):
+        row["id"] = transaction_id
+
+async def apply_stock_movements(
+    db: AsyncSession, movements: Sequence[Tuple[int, schemas.StockMovementCreate]], synchronous_commit: bool = True
+):
+    """Apply a batch of movements in one transaction (used by app.batcher).
+
+    Items are locked with ``SELECT ... FOR UPDATE`` in id order, so concurrent
+    batches cannot deadlock; movements are then applied in arrival order in
+    Python, each item is written once with its final quantity and the ledger
+    rows go in as one multi-row INSERT, inside a SAVEPOINT. If the database
+    rejects it (e.g. an unknown user_id) the batch is replayed one movement per
+    SAVEPOINT so only the offending movements fail. Returns one entry per
+    movement: the StockMovement dict, None for an unknown item or a
+    StockMovementError.
+    """
+    now = datetime.utcnow()
+    if not synchronous_commit:
+        # WAL flush happens shortly after COMMIT returns; a crash can lose the last few ms of batches
+        await db.execute(text("SET LOCAL synchronous_commit = off"))
+
+    result = await db.execute(
+        select(models.Item.id, models.Item.name, models.Item.quantity, models.Item.reorder_threshold)
+        .filter(models.Item.id.in_({item_id for item_id, _ in movements}))
+        .order_by(models.Item.id)
+        .with_for_update()
+    )
+    locked = {row.id: row for row in result}
+    balances = {item_id: row.quantity for item_id, row in locked.items()}
+    outcomes = _plan_movements(movements, balances, now)
+
+    planned = [outcome for outcome in outcomes if isinstance(outcome, tuple)]
+    if planned:
+        try:
+            async with db.begin_nested():
+                await _write_movements(db, planned, now)
+        except DBAPIError:
+            # later movements may depend on a rejected one, so plan again as we go
+            balances = {item_id: row.quantity for item_id, row in locked.items()}
+            for index, movement in enumerate(movements):
+                before = balances.get(movement[0])
+                [outcome] = _plan_movements([movement], balances, now)
+                if isinstance(outcome, tuple):
+                    try:
+                        async with db.begin_nested():
+                            await _write_movements(db, [outcome], now)
+                    except IntegrityError:
+                        # the only foreign key a movement can break is stock_transactions.user_id
+                        balances[movement[0]] = before
+                        outcome = UnknownUserError(f"User {movement[1].user_id} does not exist")
+                outcomes[index] = outcome
+
+    touched = sorted({outcome[0]["item_id"] for outcome in outcomes if isinstance(outcome, tuple)})
+    if touched:
+        await snapshot_items(db, touched, now)
+    await db.commit()
+
+    results = [{**outcome[0], "balance": outcome[1]} if isinstance(outcome, tuple) else outcome for outcome in outcomes]
+    for result in results:
+        if isinstance(result, dict):
+            events.publish_change("stock.movement", _dump(schemas.StockMovement, result))
+    # alerts compare the state before and after the whole batch
+    for item_id in touched:
+        item = locked[item_id]
+        events.check_reorder_crossing(
+            item_id, item.name, item.quantity, balances[item_id], item.reorder_threshold, item.reorder_threshold
+        )
+    return results
+
 async def get_stock_transaction(db: AsyncSession, transaction_id: int):
     result = await db.execute(select(models.StockTransaction).filter(models.StockTransaction.id == transaction_id))
     return result.scalar_one_or_none()
 
-async def get_stock_transactions_for_item(db: AsyncSession, item_id: int, skip: int = 0, limit: int = 100):
+async def get_stock_transactions_after(db: AsyncSession, after_id: int, limit: int = 1000):
+    """Ledger rows with an id above ``after_id``, in id order (change-feed catch-up)."""
     result = await db.execute(
         select(models.StockTransaction)
-        .filter(models.StockTransaction.item_id == item_id)
-        .offset(skip)
+        .filter(models.StockTransaction.id > after_id)
+        .order_by(models.StockTransaction.id)
         .limit(limit)
     )
     return result.scalars().all()
+
+async def get_stock_transactions_for_item(
+    db: AsyncSession, item_id: int, skip: int = 0, limit: int = 100, sort: str = "timestamp", descending: bool = False
+):
+    stmt = apply_order(
+        select(models.StockTransaction).filter(models.StockTransaction.item_id == item_id),
+        STOCK_TRANSACTION_SORT_COLUMNS[sort], models.StockTransaction.id, descending,
+    )
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def get_stock_transactions_for_item_page(
+    db: AsyncSession, item_id: int, cursor: str = "", limit: int = 100, sort: str = "timestamp", descending: bool = False
+):
+    return await keyset_page(
+        db,
+        select(models.StockTransaction).filter(models.StockTransaction.item_id == item_id),
+        STOCK_TRANSACTION_SORT_COLUMNS[sort], models.StockTransaction.id,
+        sort=sort, cursor=cursor, limit=limit, descending=descending,
+    )
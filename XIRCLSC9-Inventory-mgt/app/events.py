@@ -0,0 +1,180 @@
+# app/events.py
+
+import asyncio
+import json
+import secrets
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+from app.settings import settings
+
+
+class Broadcaster:
+    """In-process fan-out of events with increasing offsets.
+
+    The last ``buffer_size`` events stay in a ring buffer. Subscribers do not own
+    a queue: they remember the last offset they sent and re-read the buffer
+    whenever publish() wakes them, so publishing costs the same however many
+    clients are connected and a slow client can only fall behind, never block
+    the publisher. A client that falls out of the buffer gets a ``reset`` event.
+
+    Offsets restart with the process, so cursors (SSE ids) are prefixed with a
+    random per-process ``epoch``; a cursor from another epoch also means reset.
+    """
+
+    def __init__(self, buffer_size: int):
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self.epoch = secrets.token_hex(4)
+        self.last_offset = 0
+        self._published = asyncio.Event()
+
+    def publish(self, event_type: str, data: Dict) -> Dict:
+        self.last_offset += 1
+        event = self._event(self.last_offset, event_type, data)
+        self._buffer.append(event)
+        # wake everyone waiting on the current event, later waiters get a fresh one
+        self._published.set()
+        self._published = asyncio.Event()
+        return event
+
+    def _event(self, offset: int, event_type: str, data: Dict) -> Dict:
+        return {"offset": offset, "type": event_type, "at": datetime.utcnow().isoformat(), "data": data}
+
+    def recent(self, limit: int) -> List[Dict]:
+        return list(self._buffer)[-limit:] if limit else []
+
+    def events_after(self, offset: int) -> Optional[List[Dict]]:
+        """Buffered events newer than ``offset``, or None if some of them were already evicted."""
+        missed = self.last_offset - max(offset, 0)
+        if missed <= 0:
+            return []
+        if missed > len(self._buffer):
+            return None
+        # indexing a deque near its right end is cheap; subscribers are almost always there
+        size = len(self._buffer)
+        return [self._buffer[index] for index in range(size - missed, size)]
+
+    def cursor(self, event: Dict) -> str:
+        return f"{self.epoch}-{event['offset']}"
+
+    def parse_cursor(self, cursor: Optional[str]) -> Optional[int]:
+        """Offset to resume after; -1 for a cursor from another epoch (or unreadable), None for none."""
+        if not cursor:
+            return None
+        epoch, _, rest = cursor.partition("-")
+        offset = rest.split("-", 1)[0]
+        if epoch != self.epoch or not offset.isdigit():
+            return -1
+        return int(offset)
+
+    async def subscribe(self, since: Optional[int] = None, heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """Yield events after offset ``since`` (default: only new ones); None every idle ``heartbeat`` seconds."""
+        offset = self.last_offset if since is None else since
+        while True:
+            published = self._published
+            events = None if offset < 0 else self.events_after(offset)
+            if events is None:
+                offset = self.last_offset
+                yield self._event(offset, "reset", {})
+                continue
+            for event in events:
+                offset = event["offset"]
+                yield event
+            if events:
+                continue
+            try:
+                await asyncio.wait_for(published.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+    def sse_message(self, event: Optional[Dict]) -> str:
+        """Encode one event (or a heartbeat for None) in text/event-stream framing."""
+        if event is None:
+            return ": keep-alive\n\n"
+        return f"id: {self.cursor(event)}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def event_stream_response(events: AsyncIterator[Optional[Dict]], broadcaster: Broadcaster) -> StreamingResponse:
+    async def body():
+        async for event in events:
+            yield broadcaster.sse_message(event)
+
+    # Starlette cancels the generator when the client disconnects
+    return StreamingResponse(
+        body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# --------------------------------------
+# LOW-STOCK ALERTS
+# --------------------------------------
+alerts = Broadcaster(settings.ALERT_BUFFER_SIZE)
+
+def reorder_threshold(item_threshold: Optional[int]) -> int:
+    return settings.DEFAULT_REORDER_THRESHOLD if item_threshold is None else item_threshold
+
+def check_reorder_crossing(
+    item_id: int,
+    name: str,
+    quantity_before: int,
+    quantity_after: int,
+    threshold_before: Optional[int],
+    threshold_after: Optional[int],
+) -> Optional[Dict]:
+    """Publish an alert if the item moved below (or back to) its reorder threshold.
+
+    Called with the before/after state of every write that can change it, so
+    only crossings fire and there is never a scan over all items.
+    """
+    low_before = quantity_before < reorder_threshold(threshold_before)
+    low_after = quantity_after < reorder_threshold(threshold_after)
+    if low_before == low_after:
+        return None
+    return alerts.publish("low_stock" if low_after else "restocked", {
+        "item_id": item_id,
+        "name": name,
+        "quantity": quantity_after,
+        "reorder_threshold": reorder_threshold(threshold_after),
+    })
+
+# --------------------------------------
+# CHANGE FEED
+# --------------------------------------
+class ChangeFeed(Broadcaster):
+    """Broadcaster for entity changes whose cursors also carry a ledger watermark.
+
+    Cursors read ``<epoch>-<offset>-<ledger id>``: the last part is the highest
+    stock_transactions id published so far, so a client that fell out of the
+    buffer (or comes back after a restart) can still have the movements it
+    missed replayed from the database before it is told to resync the rest.
+    """
+
+    def __init__(self, buffer_size: int):
+        super().__init__(buffer_size)
+        self.ledger_watermark = 0
+
+    def publish(self, event_type: str, data: Dict) -> Dict:
+        if event_type == "stock.movement":
+            self.ledger_watermark = max(self.ledger_watermark, data["id"])
+        return super().publish(event_type, data)
+
+    def _event(self, offset: int, event_type: str, data: Dict) -> Dict:
+        return {**super()._event(offset, event_type, data), "ledger_id": self.ledger_watermark}
+
+    def cursor(self, event: Dict) -> str:
+        # a replayed movement has no offset of its own: resuming from it continues the replay
+        offset = "r" if event.get("replayed") else event["offset"]
+        return f"{self.epoch}-{offset}-{event['ledger_id']}"
+
+    @staticmethod
+    def parse_ledger_id(cursor: Optional[str]) -> int:
+        last = (cursor or "").rsplit("-", 1)[-1]
+        return int(last) if cursor and cursor.count("-") == 2 and last.isdigit() else 0
+
+changes = ChangeFeed(settings.CHANGE_FEED_BUFFER_SIZE)
+
+def publish_change(event_type: str, data: Dict) -> Dict:
+    """Publish an item/category/supplier/stock change; call only after the COMMIT."""
+    return changes.publish(event_type, data)
@@ -0,0 +1,204 @@
+# app/ledger.py
+"""Monthly partitions of stock_transactions and their on-disk archive.
+
+Each month lives in its own partition ``stock_transactions_yYYYYmMM``; rows
+outside every partition land in ``stock_transactions_default``. Partitions past
+the retention window are written to ``ARCHIVE_DIR`` and dropped:
+
+* ``<partition>.ndjson.gz`` - one JSON row per line, sorted by (item_id,
+  timestamp, id), cut into blocks that are each a complete gzip member;
+* ``<partition>.idx.json`` - byte offset, length and item id range of every
+  block, written last, so its presence marks a finished archive.
+
+Reading one item's history therefore decompresses only the blocks that can
+contain it, however large the archive grows.
+"""
+import gzip
+import json
+import os
+import re
+from bisect import bisect_left
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+LEDGER_TABLE = "stock_transactions"
+DEFAULT_PARTITION = f"{LEDGER_TABLE}_default"
+LEDGER_COLUMNS = ["id", "item_id", "change_type", "quantity", "user_id", "timestamp", "notes"]
+
+_PARTITION_NAME = re.compile(rf"^{LEDGER_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+# Every partition of the ledger except the default one
+LIST_PARTITIONS_SQL = f"""
+SELECT child.relname
+FROM pg_inherits
+JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+WHERE pg_inherits.inhparent = '{LEDGER_TABLE}'::regclass
+"""
+
+
+# --------------------------------------
+# PARTITIONS
+# --------------------------------------
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{LEDGER_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+def create_partition_statements(month: date) -> List[str]:
+    """DDL that adds the partition for ``month``; run it in one transaction.
+
+    Rows of that month already sitting in the default partition are moved into
+    the new table before it is attached (Postgres refuses the attach otherwise).
+    """
+    name, lower, upper = partition_name(month), month, add_months(month, 1)
+    return [
+        f"CREATE TABLE {name} (LIKE {LEDGER_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE timestamp >= '{lower}' AND timestamp < '{upper}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        f"ALTER TABLE {LEDGER_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')",
+    ]
+
+def drop_partition_statements(name: str) -> List[str]:
+    return [f"ALTER TABLE {LEDGER_TABLE} DETACH PARTITION {name}", f"DROP TABLE {name}"]
+
+async def partition_months(pg) -> Dict[date, str]:
+    """Monthly partitions present in the database, keyed by month (asyncpg connection)."""
+    names = [row["relname"] for row in await pg.fetch(LIST_PARTITIONS_SQL)]
+    return {partition_month(name): name for name in names if partition_month(name)}
+
+async def ensure_partitions(pg, first_month: date, last_month: date, dry_run: bool = False) -> List[str]:
+    """Create every missing monthly partition from ``first_month`` to ``last_month``; returns their names."""
+    existing = await partition_months(pg)
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            created.append(partition_name(month))
+            if not dry_run:
+                async with pg.transaction():
+                    for statement in create_partition_statements(month):
+                        await pg.execute(statement)
+        month = add_months(month, 1)
+    return created
+
+# --------------------------------------
+# ARCHIVE FILES
+# --------------------------------------
+def archive_paths(archive_dir: str, name: str):
+    return Path(archive_dir) / f"{name}.ndjson.gz", Path(archive_dir) / f"{name}.idx.json"
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class ArchiveWriter:
+    """Write ledger rows, already sorted by (item_id, timestamp, id), as indexed gzip blocks."""
+
+    def __init__(self, archive_dir: str, name: str, block_rows: int):
+        self.data_path, self.index_path = archive_paths(archive_dir, name)
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.block_rows = block_rows
+        self.rows = 0
+        self._blocks: List[Dict] = []
+        self._pending: List[bytes] = []
+        self._first_item_id = None
+        self._last_item_id = None
+        self._offset = 0
+        self._tmp_path = self.data_path.with_name(self.data_path.name + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+
+    def add(self, row: Dict):
+        # rows without an item sort (and are indexed) as item 0; the row itself keeps item_id null
+        index_key = 0 if row["item_id"] is None else row["item_id"]
+        if not self._pending:
+            self._first_item_id = index_key
+        self._last_item_id = index_key
+        self._pending.append(json.dumps({column: _json_value(row[column]) for column in LEDGER_COLUMNS}).encode())
+        self.rows += 1
+        if len(self._pending) >= self.block_rows:
+            self._flush_block()
+
+    def _flush_block(self):
+        block = gzip.compress(b"\n".join(self._pending) + b"\n")
+        self._file.write(block)
+        self._blocks.append({
+            "offset": self._offset,
+            "length": len(block),
+            "rows": len(self._pending),
+            "first_item_id": self._first_item_id,
+            "last_item_id": self._last_item_id,
+        })
+        self._offset += len(block)
+        self._pending = []
+
+    def close(self, lower: date, upper: date):
+        if self._pending:
+            self._flush_block()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.data_path)
+        index = {
+            "partition": self.name,
+            "from": lower.isoformat(),
+            "to": upper.isoformat(),
+            "rows": self.rows,
+            "blocks": self._blocks,
+        }
+        tmp_index = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp_index.write_text(json.dumps(index))
+        os.replace(tmp_index, self.index_path)
+
+
+@lru_cache(maxsize=256)
+def _load_index(path: str, mtime: float) -> Dict:
+    index = json.loads(Path(path).read_text())
+    index["last_item_ids"] = [block["last_item_id"] for block in index["blocks"]]
+    return index
+
+def read_archived_transactions(
+    archive_dir: str,
+    item_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 1000,
+) -> List[Dict]:
+    """Archived ledger rows of one item, oldest first (blocking file I/O)."""
+    # archived timestamps are naive UTC, like the ledger
+    start, end = (at.astimezone(timezone.utc).replace(tzinfo=None) if at and at.tzinfo else at for at in (start, end))
+    rows: List[Dict] = []
+    for index_path in sorted(Path(archive_dir).glob(f"{LEDGER_TABLE}_y*.idx.json")):
+        index = _load_index(str(index_path), index_path.stat().st_mtime)
+        if (start and datetime.fromisoformat(index["to"]) <= start) or (end and datetime.fromisoformat(index["from"]) > end):
+            continue
+        data_path, _ = archive_paths(archive_dir, index["partition"])
+        with open(data_path, "rb") as archive:
+            # blocks are sorted by item, so the first candidate is found by bisection
+            for block in index["blocks"][bisect_left(index["last_item_ids"], item_id):]:
+                if block["first_item_id"] > item_id:
+                    break
+                archive.seek(block["offset"])
+                for line in gzip.decompress(archive.read(block["length"])).splitlines():
+                    row = json.loads(line)
+                    if row["item_id"] != item_id:
+                        continue
+                    timestamp = datetime.fromisoformat(row["timestamp"])
+                    if (start and timestamp < start) or (end and timestamp > end):
+                        continue
+                    rows.append(row)
+                    if len(rows) >= limit:
+                        return rows
+    return rows
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
-from . import models, database
-from .routers import inventory, users
+from . import database
+from .batcher import movement_batcher
+from .settings import settings
+from .routers import inventory, users, export, alerts, changes
 from .auth import routes_auth  # 👈 import your auth router
 import asyncio
 
@@ -12,20 +14,36 @@ app = FastAPI(
 
 # ✅ Include Routers
 app.include_router(routes_auth.router)   # 👈 Add this
+app.include_router(routes_auth.well_known_router)
 app.include_router(inventory.router)
+app.include_router(export.router)
+app.include_router(alerts.router)
+app.include_router(changes.router)
 app.include_router(users.router)         # 👈 Add this
 
-# ✅ Async DB Table Creation
-async def init_models():
-    async with database.engine.begin() as conn:
-        await conn.run_sync(models.Base.metadata.create_all)
-
-# ✅ Startup event to create tables
+# ✅ Startup: tables come from `alembic upgrade head`, workers only verify the version
 @app.on_event("startup")
 async def on_startup():
-    await init_models()
+    if settings.DB_SCHEMA_CHECK:
+        await database.check_schema_version()
+    await movement_batcher.start()
+
+# ✅ Shutdown: write queued stock movements before the worker exits
+@app.on_event("shutdown")
+async def on_shutdown():
+    await movement_batcher.stop()
 
 # ✅ Root endpoint
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the Inventory Management System API"}
+
+# 📈 Connection pool metrics
+@app.get("/metrics/db-pool", tags=["Metrics"])
+async def db_pool_metrics():
+    return database.pool_status()
+
+# 📥 Write-behind movement queue metrics
+@app.get("/metrics/movement-queue", tags=["Metrics"])
+async def movement_queue_metrics():
+    return movement_batcher.stats()
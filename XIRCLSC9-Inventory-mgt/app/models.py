@@ -1,5 +1,7 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime
+from sqlalchemy import (
+    Column, Integer, String, Text, Float, ForeignKey, Date, DateTime, Index, LargeBinary, UniqueConstraint, func
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -30,12 +32,17 @@ class Supplier(Base):
 # 🔹 3. Item
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        # natural key used by bulk upserts (supplier feeds)
+        UniqueConstraint("name", "supplier_id", name="uq_items_name_supplier"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     description = Column(Text)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
+    reorder_threshold = Column(Integer)  # alert when quantity drops below; NULL = DEFAULT_REORDER_THRESHOLD
     category_id = Column(Integer, ForeignKey("categories.id"))
     supplier_id = Column(Integer, ForeignKey("suppliers.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -43,7 +50,23 @@ class Item(Base):
 
     category = relationship("Category", back_populates="items")
     supplier = relationship("Supplier", back_populates="items")
-    stock_transactions = relationship("StockTransaction", back_populates="item")
+    # the ledger is never touched by an item delete: items with history are RESTRICTed
+    stock_transactions = relationship("StockTransaction", back_populates="item", passive_deletes=True)
+
+
+# 🔎 Item search / sort indexes (filters and keyset ordering of GET /inventory/items/)
+Index("ix_items_category_id_price", Item.category_id, Item.price)
+Index("ix_items_supplier_id_price", Item.supplier_id, Item.price)
+Index("ix_items_quantity_id", Item.quantity, Item.id)
+Index("ix_items_price_id", Item.price, Item.id)
+Index("ix_items_name_id", Item.name, Item.id)
+Index("ix_items_updated_at_id", Item.updated_at, Item.id)
+# case-insensitive prefix search: lower(name) LIKE 'abc%'
+Index(
+    "ix_items_name_lower_prefix",
+    func.lower(Item.name).label("name_lower"),
+    postgresql_ops={"name_lower": "text_pattern_ops"},
+)
 
 
 # 🔹 4. User
@@ -60,15 +83,45 @@ class User(Base):
 
 # 🔹 5. StockTransaction
 class StockTransaction(Base):
+    """Append-only ledger, range-partitioned by month on timestamp (see app/ledger.py)."""
     __tablename__ = "stock_transactions"
-
-    id = Column(Integer, primary_key=True, index=True)
-    item_id = Column(Integer, ForeignKey("items.id"))
+    __table_args__ = (
+        # per-item history in time order; every partition gets its own copy
+        Index("ix_stock_transactions_item_id_timestamp", "item_id", "timestamp", "id"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+    # the partition key has to be part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="RESTRICT"))
     change_type = Column(String, nullable=False)  # add / remove / adjust
     quantity = Column(Integer, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)
     notes = Column(Text)
 
     item = relationship("Item", back_populates="stock_transactions")
     user = relationship("User", back_populates="stock_transactions")
+
+
+# 🔹 6. RefreshToken
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(LargeBinary(32), nullable=False, unique=True)  # sha256 of the opaque token
+    family_id = Column(LargeBinary(16), nullable=False, index=True)  # shared by every rotation of one login
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime)
+
+
+# 🔹 7. StockSnapshot
+class StockSnapshot(Base):
+    """Closing stock of one item on one (UTC) day, kept current as the item changes."""
+    __tablename__ = "stock_snapshots"
+
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    quantity = Column(Integer, nullable=False)
+    value = Column(Float, nullable=False)  # quantity * price at the time of the last write that day
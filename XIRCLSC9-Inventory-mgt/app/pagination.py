@@ -0,0 +1,75 @@
+# app/pagination.py
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# --------------------------------------
+# OPAQUE CURSOR TOKENS
+# --------------------------------------
+def encode_cursor(sort: str, descending: bool, value: Any, last_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort, "d": descending, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, descending: bool, sort_column) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload["s"] != sort or payload["d"] != descending:
+            raise ValueError("cursor was issued for a different ordering")
+        value = payload["v"]
+        if value is not None and isinstance(sort_column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        return value, int(payload["id"])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid or stale cursor")
+
+# --------------------------------------
+# KEYSET (SEEK) PAGINATION
+# --------------------------------------
+def apply_order(stmt, sort_column, id_column, descending: bool = False):
+    """Order by ``sort_column`` with ``id_column`` as tie-breaker so pages are stable."""
+    order = [id_column] if sort_column is id_column else [sort_column, id_column]
+    return stmt.order_by(*(column.desc() if descending else column for column in order))
+
+async def keyset_page(
+    db: AsyncSession,
+    stmt,
+    sort_column,
+    id_column,
+    sort: str,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+):
+    """Run ``stmt`` as one page ordered by ``(sort_column, id_column)``.
+
+    Instead of OFFSET, the page starts right after the ``(sort_key, id)`` pair
+    stored in ``cursor``, so page N costs the same as page 1 when the pair is
+    covered by an index. An empty ``cursor`` returns the first page.
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    by_id = sort_column is id_column
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, descending, sort_column)
+        if by_id:
+            stmt = stmt.filter(id_column < last_id if descending else id_column > last_id)
+        else:
+            key, bound = tuple_(sort_column, id_column), tuple_(value, last_id)
+            stmt = stmt.filter(key < bound if descending else key > bound)
+
+    result = await db.execute(apply_order(stmt, sort_column, id_column, descending).limit(limit + 1))
+    rows = result.scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, descending, getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
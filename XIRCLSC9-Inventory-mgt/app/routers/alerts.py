@@ -0,0 +1,33 @@
+# app/routers/alerts.py
+
+from typing import List, Optional
+from fastapi import APIRouter, Header, Query
+from .. import events, schemas
+from ..settings import settings
+
+router = APIRouter(
+    prefix="/inventory/alerts",
+    tags=["Alerts"]
+)
+
+# --------------------------
+# ALERT ROUTES
+# --------------------------
+@router.get("/recent", response_model=List[schemas.Event])
+async def get_recent_alerts(limit: int = Query(50, ge=1, le=1000)):
+    """Latest low_stock / restocked alerts kept by this worker."""
+    return events.alerts.recent(limit)
+
+@router.get("/stream")
+async def stream_alerts(
+    since: Optional[str] = Query(None, description="Replay buffered alerts after this event id"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """Server-Sent Events: one ``low_stock`` or ``restocked`` event per threshold crossing.
+
+    Reconnecting clients resume from ``?since=`` or the Last-Event-ID header.
+    """
+    offset = events.alerts.parse_cursor(since or last_event_id)
+    return events.event_stream_response(
+        events.alerts.subscribe(offset, heartbeat=settings.SSE_HEARTBEAT_SECONDS), events.alerts
+    )
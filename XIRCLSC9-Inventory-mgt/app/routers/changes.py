@@ -0,0 +1,92 @@
+# app/routers/changes.py
+
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import APIRouter, Header, Query
+from pydantic import ValidationError
+from .. import crud, database, events, schemas
+from ..settings import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/inventory/changes",
+    tags=["Changes"]
+)
+
+async def _change_events(offset: Optional[int], ledger_id: int, prefixes: Tuple[str, ...]):
+    """Buffered and live change events; catches up from the ledger after a gap."""
+    feed = events.changes
+    while True:
+        if offset is not None and (offset < 0 or feed.events_after(offset) is None):
+            # the buffer no longer covers the client: replay the movements it missed from
+            # the ledger, then send ``reset`` so it re-reads items, categories and suppliers
+            resume = feed.last_offset
+            missed = []
+            if ledger_id and (not prefixes or "stock.movement".startswith(prefixes)):
+                async with database.AsyncSessionLocal() as session:
+                    missed = await crud.get_stock_transactions_after(session, ledger_id, settings.CHANGE_FEED_REPLAY_LIMIT)
+            for transaction in missed:
+                ledger_id = transaction.id
+                try:
+                    data = schemas.StockTransaction.model_validate(transaction).model_dump(mode="json")
+                except ValidationError:
+                    # one unreadable row must not end the stream for everyone resuming past it
+                    logger.exception("Skipping ledger row %s in change feed replay", transaction.id)
+                    continue
+                yield {
+                    "offset": resume,
+                    "type": "stock.movement",
+                    "at": datetime.utcnow().isoformat(),
+                    "data": data,
+                    "ledger_id": ledger_id,
+                    "replayed": True,
+                }
+            truncated = len(missed) == settings.CHANGE_FEED_REPLAY_LIMIT
+            yield {
+                "offset": resume,
+                "type": "reset",
+                "at": datetime.utcnow().isoformat(),
+                "data": {"replayed": len(missed), "truncated": truncated},
+                # truncated: resume from the last row sent, so the next reconnect replays the rest
+                "ledger_id": ledger_id if truncated else max(ledger_id, feed.ledger_watermark),
+            }
+            offset = resume
+
+        async for event in feed.subscribe(offset, heartbeat=settings.SSE_HEARTBEAT_SECONDS):
+            if event is None:
+                yield None
+                continue
+            if event["type"] == "reset":
+                # fell behind while connected: go through the ledger catch-up above
+                offset = -1
+                break
+            offset = event["offset"]
+            ledger_id = event["ledger_id"]
+            if not prefixes or event["type"].startswith(prefixes):
+                yield event
+
+# --------------------------
+# CHANGE FEED ROUTES
+# --------------------------
+@router.get("")
+async def stream_changes(
+    since: Optional[str] = Query(None, description="Resume after this event id (the SSE id of the last event seen)"),
+    types: Optional[str] = Query(None, description="Comma-separated type prefixes, e.g. item,stock.movement"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """Server-Sent Events for item / category / supplier changes and stock movements.
+
+    Event types: ``item.created``, ``item.updated``, ``item.deleted``,
+    ``category.created``, ``supplier.created``, ``stock.movement`` and ``reset``
+    (state may have been missed: re-read it). Delivery is at least once; movements
+    carry their ledger ``id`` for de-duplication. Each worker streams the changes
+    made through it.
+    """
+    cursor = since or last_event_id
+    prefixes = tuple(prefix.strip() for prefix in (types or "").split(",") if prefix.strip())
+    return events.event_stream_response(
+        _change_events(events.changes.parse_cursor(cursor), events.changes.parse_ledger_id(cursor), prefixes),
+        events.changes,
+    )
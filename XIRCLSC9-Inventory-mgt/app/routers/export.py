@@ -0,0 +1,122 @@
+# app/routers/export.py
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.future import select
+from .. import crud, database, models
+
+router = APIRouter(
+    prefix="/inventory/export",
+    tags=["Export"]
+)
+
+ExportFormat = Literal["csv", "ndjson"]
+
+EXPORT_BATCH_ROWS = 1000     # rows per server-side cursor fetch
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+async def _stream_rows(session, result, first_rows, fmt: str, compress: bool):
+    """Yield the encoded rows of an open streaming ``result`` in ~64 KB chunks, gzip-compressed on the fly if asked.
+
+    ``first_rows`` were already fetched by _export_response; the rest come from
+    the server-side cursor, so memory stays flat however many rows are exported.
+    Closes ``session`` when done.
+    """
+    encoder = zlib.compressobj(wbits=31) if compress else None  # wbits=31 -> gzip framing
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+
+    def drain(final: bool = False) -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        if encoder:
+            data = encoder.compress(data) + (encoder.flush() if final else b"")
+        return data
+
+    def encode(row):
+        if writer:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, map(_json_value, row)))) + "\n")
+
+    try:
+        columns = list(result.keys())
+        if writer:
+            writer.writerow(columns)
+        for row in first_rows:
+            encode(row)
+        async for row in result:
+            encode(row)
+            if buffer.tell() >= EXPORT_FLUSH_BYTES:
+                chunk = drain()
+                if chunk:
+                    yield chunk
+    finally:
+        await session.close()
+
+    chunk = drain(final=True)
+    if chunk:
+        yield chunk
+
+async def _export_response(name: str, stmt, fmt: str, compress: bool) -> StreamingResponse:
+    # The statement runs on its own session (the request's get_db session is closed
+    # before the body is sent). It is executed and its first batch fetched here, so
+    # a failing query is an error response instead of a truncated 200.
+    session = database.AsyncSessionLocal()
+    try:
+        result = await session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        first_rows = await result.fetchmany(EXPORT_BATCH_ROWS)
+    except BaseException:
+        await session.close()
+        raise
+
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _stream_rows(session, result, first_rows, fmt, compress),
+        media_type=MEDIA_TYPES[fmt],
+        headers=headers,
+        # also covers a client that disconnects before the body starts (closing twice is harmless)
+        background=BackgroundTask(session.close),
+    )
+
+# --------------------------
+# EXPORT ROUTES
+# --------------------------
+@router.get("/items")
+async def export_items(
+    fmt: ExportFormat = Query("csv", alias="format"),
+    gzip: bool = False,
+    since: Optional[datetime] = Query(None, description="Only items with updated_at >= since (naive = UTC)"),
+):
+    stmt = select(*models.Item.__table__.c).order_by(models.Item.id)
+    if since is not None:
+        stmt = stmt.where(models.Item.updated_at >= crud.naive_utc(since))
+    return await _export_response("items", stmt, fmt, gzip)
+
+@router.get("/transactions")
+async def export_transactions(
+    fmt: ExportFormat = Query("csv", alias="format"),
+    gzip: bool = False,
+    since: Optional[datetime] = Query(None, description="Only transactions with timestamp >= since (naive = UTC)"),
+):
+    stmt = select(*models.StockTransaction.__table__.c).order_by(models.StockTransaction.id)
+    if since is not None:
+        stmt = stmt.where(models.StockTransaction.timestamp >= crud.naive_utc(since))
+    return await _export_response("stock_transactions", stmt, fmt, gzip)
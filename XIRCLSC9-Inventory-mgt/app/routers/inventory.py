@@ -1,9 +1,17 @@
 # app/routers/inventory.py
 
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from .. import crud, schemas, database
+from typing import List, Literal, Optional, Union
+from .. import crud, schemas, database, events, ledger
+from ..batcher import movement_batcher
+from ..cache import cache
+from ..settings import settings
 
 router = APIRouter(
     prefix="/inventory",
@@ -12,6 +20,16 @@ router = APIRouter(
 
 get_db = database.get_db
 
+CURSOR_DESCRIPTION = "Opaque keyset cursor. Pass an empty value to start cursor pagination, then the returned next_cursor."
+
+CategorySort = Literal["id", "name"]
+SupplierSort = Literal["id", "name"]
+ItemSort = Literal["id", "name", "quantity", "price", "updated_at"]
+StockTransactionSort = Literal["id", "timestamp"]
+SortOrder = Literal["asc", "desc"]
+
+BULK_CHUNK_SIZE = 1000
+
 # --------------------------
 # CATEGORY ROUTES
 # --------------------------
@@ -19,9 +37,21 @@ get_db = database.get_db
 async def create_category(category: schemas.CategoryCreate, db: AsyncSession = Depends(get_db)):
     return await crud.create_category(db=db, category=category)
 
-@router.get("/categories/", response_model=List[schemas.Category])
-async def get_categories(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
-    return await crud.get_categories(db=db, skip=skip, limit=limit)
+@router.get("/categories/", response_model=Union[List[schemas.Category], schemas.Page[schemas.Category]])
+async def get_categories(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    sort: CategorySort = "id",
+    order: SortOrder = "asc",
+    db: AsyncSession = Depends(get_db),
+):
+    if cursor is not None:
+        categories, next_cursor = await crud.get_categories_page(
+            db=db, cursor=cursor, limit=limit, sort=sort, descending=order == "desc"
+        )
+        return {"items": categories, "next_cursor": next_cursor}
+    return await crud.get_categories(db=db, skip=skip, limit=limit, sort=sort, descending=order == "desc")
 
 @router.get("/categories/{category_id}", response_model=schemas.Category)
 async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
@@ -37,9 +67,21 @@ async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
 async def create_supplier(supplier: schemas.SupplierCreate, db: AsyncSession = Depends(get_db)):
     return await crud.create_supplier(db=db, supplier=supplier)
 
-@router.get("/suppliers/", response_model=List[schemas.Supplier])
-async def get_suppliers(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
-    return await crud.get_suppliers(db=db, skip=skip, limit=limit)
+@router.get("/suppliers/", response_model=Union[List[schemas.Supplier], schemas.Page[schemas.Supplier]])
+async def get_suppliers(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    sort: SupplierSort = "id",
+    order: SortOrder = "asc",
+    db: AsyncSession = Depends(get_db),
+):
+    if cursor is not None:
+        suppliers, next_cursor = await crud.get_suppliers_page(
+            db=db, cursor=cursor, limit=limit, sort=sort, descending=order == "desc"
+        )
+        return {"items": suppliers, "next_cursor": next_cursor}
+    return await crud.get_suppliers(db=db, skip=skip, limit=limit, sort=sort, descending=order == "desc")
 
 @router.get("/suppliers/{supplier_id}", response_model=schemas.Supplier)
 async def get_supplier(supplier_id: int, db: AsyncSession = Depends(get_db)):
@@ -55,16 +97,119 @@ async def get_supplier(supplier_id: int, db: AsyncSession = Depends(get_db)):
 async def create_item(item: schemas.ItemCreate, db: AsyncSession = Depends(get_db)):
     return await crud.create_item(db=db, item=item)
 
-@router.get("/items/", response_model=List[schemas.Item])
-async def get_items(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
-    return await crud.get_items(db=db, skip=skip, limit=limit)
+async def _iter_bulk_rows(request: Request):
+    """Yield (index, raw row) from a JSON array body or an NDJSON stream."""
+    if "ndjson" in request.headers.get("content-type", ""):
+        index, buffer = 0, b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if buffer.strip():
+            yield index, buffer
+        return
+
+    try:
+        rows = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for index, row in enumerate(rows):
+        yield index, row
+
+@router.post("/items/bulk", response_model=schemas.BulkItemResponse)
+async def bulk_upsert_items(
+    request: Request,
+    on_conflict: Literal["update", "skip"] = "update",
+    db: AsyncSession = Depends(get_db),
+):
+    """Create or update many items in one transaction, keyed on (name, supplier_id).
+
+    Accepts ``application/json`` (array) or ``application/x-ndjson`` (one item per line).
+    """
+    response = schemas.BulkItemResponse()
+    chunk = []
+
+    async def flush():
+        for result in await crud.upsert_item_chunk(db=db, rows=chunk, on_conflict=on_conflict):
+            response.results.append(schemas.BulkItemResult(**result))
+        chunk.clear()
+
+    async for index, raw in _iter_bulk_rows(request):
+        try:
+            payload = json.loads(raw) if isinstance(raw, bytes) else raw
+            chunk.append((index, schemas.ItemCreate.model_validate(payload)))
+        except (ValueError, ValidationError) as exc:
+            response.results.append(schemas.BulkItemResult(index=index, status="error", error=str(exc)))
+            continue
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+    await db.commit()
+    for result in response.results:
+        if result.status in ("created", "updated"):
+            events.publish_change(f"item.{result.status}", {"id": result.id})
 
-@router.get("/items/{item_id}", response_model=schemas.Item)
-async def get_item(item_id: int, db: AsyncSession = Depends(get_db)):
-    db_item = await crud.get_item(db, item_id)
+    response.results.sort(key=lambda result: result.index)
+    for result in response.results:
+        if result.status == "error":
+            response.errors += 1
+        else:
+            setattr(response, result.status, getattr(response, result.status) + 1)
+    return response
+
+def parse_expand(expand: Optional[str] = Query(None, description="Comma-separated relations to embed: category,supplier")):
+    fields = tuple(dict.fromkeys(field.strip() for field in (expand or "").split(",") if field.strip()))
+    unknown = set(fields) - set(crud.ITEM_EXPANDABLE)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot expand: {', '.join(sorted(unknown))}")
+    return fields
+
+def _serialize_item(db_item, expand):
+    # Only the expanded relationships are read, so none is ever lazy-loaded; the
+    # others stay unset and response_model_exclude_unset leaves them out
+    if not expand:
+        return schemas.Item.model_validate(db_item)
+    data = schemas.Item.model_validate(db_item).model_dump()
+    data.update((name, getattr(db_item, name)) for name in expand)
+    return schemas.ItemExpanded.model_validate(data, from_attributes=True)
+
+@router.get(
+    "/items/",
+    response_model=Union[List[schemas.ItemExpanded], schemas.Page[schemas.ItemExpanded]],
+    response_model_exclude_unset=True,
+)
+async def get_items(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    sort: ItemSort = "id",
+    order: SortOrder = "asc",
+    expand: tuple = Depends(parse_expand),
+    filters: schemas.ItemFilter = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    if cursor is not None:
+        items, next_cursor = await crud.get_items_page(
+            db=db, cursor=cursor, limit=limit, sort=sort, descending=order == "desc", expand=expand, filters=filters
+        )
+        return {"items": [_serialize_item(item, expand) for item in items], "next_cursor": next_cursor}
+    items = await crud.get_items(
+        db=db, skip=skip, limit=limit, sort=sort, descending=order == "desc", expand=expand, filters=filters
+    )
+    return [_serialize_item(item, expand) for item in items]
+
+@router.get("/items/{item_id}", response_model=schemas.ItemExpanded, response_model_exclude_unset=True)
+async def get_item(item_id: int, expand: tuple = Depends(parse_expand), db: AsyncSession = Depends(get_db)):
+    db_item = await crud.get_item(db, item_id, expand=expand)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    return db_item
+    return _serialize_item(db_item, expand)
 
 @router.put("/items/{item_id}", response_model=schemas.Item)
 async def update_item(item_id: int, item: schemas.ItemCreate, db: AsyncSession = Depends(get_db)):
@@ -75,7 +220,133 @@ async def update_item(item_id: int, item: schemas.ItemCreate, db: AsyncSession =
 
 @router.delete("/items/{item_id}", response_model=schemas.Item)
 async def delete_item(item_id: int, db: AsyncSession = Depends(get_db)):
-    deleted_item = await crud.delete_item(db=db, item_id=item_id)
+    try:
+        deleted_item = await crud.delete_item(db=db, item_id=item_id)
+    except crud.ItemHasHistoryError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     if deleted_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
     return deleted_item
+
+@router.post("/items/{item_id}/movements", response_model=schemas.StockMovement, status_code=201)
+async def create_stock_movement(
+    item_id: int,
+    movement: schemas.StockMovementCreate,
+    queued: bool = Query(False, description="Write through the batching queue (see MOVEMENT_ACK)"),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        if queued:
+            result = await movement_batcher.submit(item_id, movement)
+            if movement_batcher.ack == "accepted":
+                return JSONResponse(status_code=202, content={"status": "accepted", "item_id": item_id})
+        else:
+            result = await crud.apply_stock_movement(db=db, item_id=item_id, movement=movement)
+    except crud.UnknownUserError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except crud.StockMovementError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return result
+
+@router.get(
+    "/items/{item_id}/transactions",
+    response_model=Union[List[schemas.StockTransaction], schemas.Page[schemas.StockTransaction]],
+)
+async def get_item_transactions(
+    item_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    sort: StockTransactionSort = "timestamp",
+    order: SortOrder = "asc",
+    db: AsyncSession = Depends(get_db),
+):
+    if cursor is not None:
+        transactions, next_cursor = await crud.get_stock_transactions_for_item_page(
+            db=db, item_id=item_id, cursor=cursor, limit=limit, sort=sort, descending=order == "desc"
+        )
+        return {"items": transactions, "next_cursor": next_cursor}
+    return await crud.get_stock_transactions_for_item(
+        db=db, item_id=item_id, skip=skip, limit=limit, sort=sort, descending=order == "desc"
+    )
+
+@router.get("/items/{item_id}/transactions/archive", response_model=List[schemas.StockTransaction])
+async def get_item_archived_transactions(
+    item_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    """Transactions of months that maintain_ledger.py has moved out of the database, oldest first."""
+    return await run_in_threadpool(
+        ledger.read_archived_transactions, settings.ARCHIVE_DIR, item_id, start=start, end=end, limit=limit
+    )
+
+@router.get("/items/{item_id}/stock", response_model=schemas.ItemStockAsOf)
+async def get_item_stock_as_of(item_id: int, at: datetime, db: AsyncSession = Depends(get_db)):
+    stock = await crud.get_item_stock_as_of(db=db, item_id=item_id, at=at)
+    if stock is None:
+        raise HTTPException(status_code=404, detail="No stock recorded for this item at that time")
+    return stock
+
+@router.get("/items/{item_id}/history", response_model=List[schemas.StockSnapshot])
+async def get_item_stock_history(
+    item_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Daily closing stock; defaults to the last 30 days."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return await crud.get_stock_history(db=db, item_id=item_id, start=start, end=end)
+
+# --------------------------
+# STATS ROUTES
+# --------------------------
+@router.get("/stats", response_model=schemas.InventoryStats)
+async def get_inventory_stats(low_stock_threshold: int = Query(settings.DEFAULT_REORDER_THRESHOLD, ge=0), db: AsyncSession = Depends(get_db)):
+    return await crud.get_inventory_stats(db=db, low_stock_threshold=low_stock_threshold)
+
+@router.get("/stats/categories", response_model=List[schemas.GroupStats])
+async def get_category_stats(low_stock_threshold: int = Query(settings.DEFAULT_REORDER_THRESHOLD, ge=0), db: AsyncSession = Depends(get_db)):
+    return await crud.get_category_stats(db=db, low_stock_threshold=low_stock_threshold)
+
+@router.get("/stats/suppliers", response_model=List[schemas.GroupStats])
+async def get_supplier_stats(low_stock_threshold: int = Query(settings.DEFAULT_REORDER_THRESHOLD, ge=0), db: AsyncSession = Depends(get_db)):
+    return await crud.get_supplier_stats(db=db, low_stock_threshold=low_stock_threshold)
+
+@router.get("/stats/top-items", response_model=List[schemas.ItemValue])
+async def get_top_items(
+    by: Literal["quantity", "value"] = "quantity",
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    return await crud.get_top_items(db=db, by=by, limit=limit)
+
+@router.get("/stats/low-stock", response_model=List[schemas.ItemValue])
+async def get_low_stock_items(
+    low_stock_threshold: int = Query(settings.DEFAULT_REORDER_THRESHOLD, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    return await crud.get_low_stock_items(db=db, low_stock_threshold=low_stock_threshold, limit=limit)
+
+@router.get("/stats/valuation", response_model=schemas.ValuationStats)
+async def get_valuation_stats(buckets: int = Query(20, ge=1, le=100), db: AsyncSession = Depends(get_db)):
+    return await crud.get_valuation_stats(db=db, buckets=buckets)
+
+@router.get("/stats/as-of", response_model=schemas.StockTotalsAsOf)
+async def get_stock_totals_as_of(at: datetime, db: AsyncSession = Depends(get_db)):
+    return await crud.get_stock_totals_as_of(db=db, at=at)
+
+# --------------------------
+# CACHE ROUTES
+# --------------------------
+@router.get("/cache/stats", response_model=schemas.CacheStats)
+async def get_cache_stats():
+    return cache.stats()
@@ -3,14 +3,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.database import get_db
 from app import models, schemas
-from app.auth.auth_bearer import jwt_bearer
-from app.auth.auth_handler import decode_access_token
+from app.auth.auth_bearer import get_current_principal
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-async def get_current_user_role(token: str = Depends(jwt_bearer)) -> str:
-    payload = await decode_access_token(token)
-    return payload.get("role")
+async def get_current_user_role(principal: schemas.Principal = Depends(get_current_principal)) -> str:
+    return principal.role
 
 @router.get("/", response_model=list[schemas.User])
 async def list_users(
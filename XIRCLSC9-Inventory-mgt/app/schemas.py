@@ -1,6 +1,14 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import Generic, List, Literal, Optional, TypeVar
+from datetime import date, datetime
+
+T = TypeVar("T")
+
+
+# 🔹 Cursor Pagination Envelope
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
 
 
 # 🔹 Category Schemas
@@ -40,6 +48,7 @@ class ItemBase(BaseModel):
     description: Optional[str] = None
     quantity: int
     price: float
+    reorder_threshold: Optional[int] = None
     category_id: int
     supplier_id: int
 
@@ -54,6 +63,115 @@ class Item(ItemBase):
     class Config:
         from_attributes = True
 
+class ItemFilter(BaseModel):
+    category_id: Optional[int] = None
+    supplier_id: Optional[int] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    low_stock_threshold: Optional[int] = None  # quantity < threshold
+    name_prefix: Optional[str] = None  # case-insensitive
+
+class ItemExpanded(Item):
+    # only present when requested with ?expand=category,supplier
+    category: Optional[Category] = None
+    supplier: Optional[Supplier] = None
+
+
+# 🔹 Bulk Item Schemas
+class BulkItemResult(BaseModel):
+    index: int
+    status: str  # created / updated / skipped / error
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkItemResponse(BaseModel):
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: int = 0
+    results: List[BulkItemResult] = []
+
+
+# 🔹 Inventory Stats Schemas
+class InventoryStats(BaseModel):
+    total_items: int
+    total_stock: int
+    total_value: float
+    low_stock_items: int
+    low_stock_threshold: int
+
+class GroupStats(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    total_items: int
+    total_stock: int
+    total_value: float
+    low_stock_items: int
+
+class ItemValue(BaseModel):
+    id: int
+    name: str
+    quantity: int
+    price: float
+    total_value: float
+
+    class Config:
+        from_attributes = True
+
+class HistogramBucket(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+class ValuationStats(BaseModel):
+    total_items: int
+    total_stock: int
+    total_value: float
+    average_price: float
+    average_quantity: float
+    value_p50: float
+    value_p90: float
+    value_p99: float
+    quantity_histogram: List[HistogramBucket]
+    value_histogram: List[HistogramBucket]
+
+# 🔹 Stock Snapshot Schemas
+class StockSnapshot(BaseModel):
+    day: date
+    quantity: int
+    value: float
+
+    class Config:
+        from_attributes = True
+
+class StockTotalsAsOf(BaseModel):
+    at: datetime
+    total_items: int
+    total_stock: int
+    total_value: float
+
+class ItemStockAsOf(BaseModel):
+    at: datetime
+    item_id: int
+    name: str
+    quantity: int
+    value: float
+
+# 🔹 Event Schemas (alerts / change feed)
+class Event(BaseModel):
+    offset: int
+    type: str
+    at: datetime
+    data: dict
+    ledger_id: Optional[int] = None  # change feed only: newest ledger id published so far
+
+# 🔹 Cache Schemas
+class CacheStats(BaseModel):
+    backend: str
+    hits: int
+    misses: int
+    invalidations: int
+
 # 🔹 StockTransaction Schemas
 class StockTransactionBase(BaseModel):
     item_id: int
@@ -66,12 +184,37 @@ class StockTransactionCreate(StockTransactionBase):
     pass
 
 class StockTransaction(StockTransactionBase):
+    # ledger rows may have no user (movements without one) or no item (rows
+    # orphaned before items with history became undeletable)
+    item_id: Optional[int] = None
+    user_id: Optional[int] = None
     id: int
     timestamp: datetime
 
     class Config:
         from_attributes = True
 
+# 🔹 Stock Movement Schemas
+MAX_STOCK_QUANTITY = 2**31 - 1  # items.quantity and stock_transactions.quantity are PostgreSQL integers
+
+class StockMovementCreate(BaseModel):
+    change_type: Literal["add", "remove", "adjust"]
+    # add / remove: units moved (> 0); adjust: signed correction
+    quantity: int = Field(ge=-MAX_STOCK_QUANTITY, le=MAX_STOCK_QUANTITY)
+    user_id: Optional[int] = None
+    notes: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_quantity(self):
+        if self.change_type == "adjust" and self.quantity == 0:
+            raise ValueError("adjust quantity must be non-zero")
+        if self.change_type != "adjust" and self.quantity <= 0:
+            raise ValueError(f"{self.change_type} quantity must be positive")
+        return self
+
+class StockMovement(StockTransaction):
+    balance: int  # item quantity after the movement
+
 
 # ------------------------------------------------------
 
@@ -99,6 +242,17 @@ class UserLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: Optional[int] = None  # access token lifetime in seconds
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
-    username: Optional[str] = None
\ No newline at end of file
+    username: Optional[str] = None
+
+# Verified identity carried by an access token (request.state.principal)
+class Principal(BaseModel):
+    sub: str
+    role: Optional[str] = None
+    exp: datetime
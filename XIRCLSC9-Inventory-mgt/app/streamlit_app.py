@@ -9,6 +9,7 @@ import plotly.graph_objects as go
 
 # 🔧 Configuration
 API_BASE_URL = "http://127.0.0.1:8000"  # Update this to your FastAPI server URL
+LOW_STOCK_THRESHOLD = 10  # same as the API's DEFAULT_REORDER_THRESHOLD
 
 # 🎨 Page Configuration
 st.set_page_config(
@@ -54,12 +55,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # 🔧 Helper Functions
-def make_api_request(method: str, endpoint: str, data: Dict = None) -> Dict:
+def make_api_request(method: str, endpoint: str, data: Dict = None, params: Dict = None) -> Dict:
     """Make API request to FastAPI backend"""
     url = f"{API_BASE_URL}{endpoint}"
     try:
         if method == "GET":
-            response = requests.get(url)
+            response = requests.get(url, params=params)
         elif method == "POST":
             response = requests.post(url, json=data)
         elif method == "PUT":
@@ -89,61 +90,93 @@ def show_dashboard():
     """Display dashboard with key metrics and charts"""
     st.markdown('<h1 class="main-header">📊 Inventory Management Dashboard</h1>', unsafe_allow_html=True)
     
-    # Fetch data
-    items_response = make_api_request("GET", "/inventory/items/")
-    categories_response = make_api_request("GET", "/inventory/categories/")
-    suppliers_response = make_api_request("GET", "/inventory/suppliers/")
+    # Fetch pre-aggregated data (a few hundred bytes instead of the whole catalog)
+    stats_response = make_api_request("GET", "/inventory/stats", params={"low_stock_threshold": LOW_STOCK_THRESHOLD})
     
-    if not items_response["success"]:
+    if not stats_response["success"]:
         display_error("Unable to load dashboard data")
         return
     
-    items = items_response["data"]
-    categories = categories_response["data"] if categories_response["success"] else []
-    suppliers = suppliers_response["data"] if suppliers_response["success"] else []
+    stats = stats_response["data"]
     
     # Key Metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Items", len(items))
+        st.metric("Total Items", stats["total_items"])
     
     with col2:
-        total_quantity = sum(item["quantity"] for item in items)
-        st.metric("Total Stock", total_quantity)
+        st.metric("Total Stock", stats["total_stock"])
     
     with col3:
-        total_value = sum(item["quantity"] * item["price"] for item in items)
-        st.metric("Total Value", f"₹{total_value:,.2f}")
+        st.metric("Total Value", f"₹{stats['total_value']:,.2f}")
     
     with col4:
-        low_stock_items = [item for item in items if item["quantity"] < 10]
-        st.metric("Low Stock Items", len(low_stock_items), delta=f"-{len(low_stock_items)}")
+        low_stock_count = stats["low_stock_items"]
+        st.metric("Low Stock Items", low_stock_count, delta=f"-{low_stock_count}")
     
     # Charts
-    if items:
+    if stats["total_items"]:
+        top_quantity_response = make_api_request("GET", "/inventory/stats/top-items", params={"by": "quantity", "limit": 10})
+        top_value_response = make_api_request("GET", "/inventory/stats/top-items", params={"by": "value", "limit": 10})
+        
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("📈 Stock Quantity by Item")
-            df_items = pd.DataFrame(items)
-            fig = px.bar(df_items.head(10), x="name", y="quantity", 
-                        title="Top 10 Items by Quantity")
-            fig.update_xaxes(tickangle=45)
-            st.plotly_chart(fig, use_container_width=True)
+            if top_quantity_response["success"]:
+                df_items = pd.DataFrame(top_quantity_response["data"])
+                fig = px.bar(df_items, x="name", y="quantity", 
+                            title="Top 10 Items by Quantity")
+                fig.update_xaxes(tickangle=45)
+                st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             st.subheader("💰 Value Distribution")
-            df_items["total_value"] = df_items["quantity"] * df_items["price"]
-            fig = px.pie(df_items.head(10), values="total_value", names="name",
-                        title="Top 10 Items by Value")
-            st.plotly_chart(fig, use_container_width=True)
+            if top_value_response["success"]:
+                df_items = pd.DataFrame(top_value_response["data"])
+                fig = px.pie(df_items, values="total_value", names="name",
+                            title="Top 10 Items by Value")
+                st.plotly_chart(fig, use_container_width=True)
+        
+        category_response = make_api_request("GET", "/inventory/stats/categories", params={"low_stock_threshold": LOW_STOCK_THRESHOLD})
+        supplier_response = make_api_request("GET", "/inventory/stats/suppliers", params={"low_stock_threshold": LOW_STOCK_THRESHOLD})
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("🏷️ Stock by Category")
+            if category_response["success"] and category_response["data"]:
+                df_categories = pd.DataFrame(category_response["data"])
+                fig = px.bar(df_categories, x="name", y="total_stock", title="Stock per Category")
+                st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            st.subheader("🚚 Value by Supplier")
+            if supplier_response["success"] and supplier_response["data"]:
+                df_suppliers = pd.DataFrame(supplier_response["data"])
+                fig = px.bar(df_suppliers, x="name", y="total_value", title="Stock Value per Supplier")
+                st.plotly_chart(fig, use_container_width=True)
         
         # Low Stock Alert
-        if low_stock_items:
-            st.subheader("⚠️ Low Stock Alert")
-            df_low_stock = pd.DataFrame(low_stock_items)
-            st.dataframe(df_low_stock[["name", "quantity", "price"]], use_container_width=True)
+        if low_stock_count:
+            low_stock_response = make_api_request("GET", "/inventory/stats/low-stock", params={"low_stock_threshold": LOW_STOCK_THRESHOLD})
+            if low_stock_response["success"]:
+                st.subheader("⚠️ Low Stock Alert")
+                df_low_stock = pd.DataFrame(low_stock_response["data"])
+                st.dataframe(df_low_stock[["name", "quantity", "price"]], use_container_width=True)
+    
+    # Threshold crossings pushed by the API (GET /inventory/alerts/stream for a live SSE feed)
+    alerts_response = make_api_request("GET", "/inventory/alerts/recent", params={"limit": 20})
+    if alerts_response["success"] and alerts_response["data"]:
+        st.subheader("🔔 Recent Stock Alerts")
+        for alert in reversed(alerts_response["data"]):
+            data = alert["data"]
+            message = f"{alert['at'][:19]} · {data['name']}: {data['quantity']} units (reorder at {data['reorder_threshold']})"
+            if alert["type"] == "low_stock":
+                st.warning(f"⚠️ {message}")
+            else:
+                st.success(f"✅ {message}")
 
 # 📦 Items Management
 def show_items():
@@ -154,13 +187,47 @@ def show_items():
     
     with tab1:
         st.subheader("Current Inventory Items")
-        response = make_api_request("GET", "/inventory/items/")
+        
+        # Filters are applied by the API (indexed), not in pandas
+        params = {"expand": "category,supplier"}
+        with st.expander("🔎 Filter & Sort"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                name_prefix = st.text_input("Name starts with")
+                category_id = st.number_input("Category ID", min_value=0, value=0, help="0 = any")
+                supplier_id = st.number_input("Supplier ID", min_value=0, value=0, help="0 = any")
+            with col2:
+                min_price = st.number_input("Min Price", min_value=0.0, value=0.0, format="%.2f")
+                max_price = st.number_input("Max Price", min_value=0.0, value=0.0, format="%.2f", help="0 = no limit")
+                low_stock_only = st.checkbox(f"Only low stock (< {LOW_STOCK_THRESHOLD})")
+            with col3:
+                sort = st.selectbox("Sort by", ["id", "name", "quantity", "price", "updated_at"])
+                order = st.radio("Order", ["asc", "desc"], horizontal=True)
+        
+        params.update({"sort": sort, "order": order})
+        if name_prefix:
+            params["name_prefix"] = name_prefix
+        if category_id:
+            params["category_id"] = category_id
+        if supplier_id:
+            params["supplier_id"] = supplier_id
+        if min_price:
+            params["min_price"] = min_price
+        if max_price:
+            params["max_price"] = max_price
+        if low_stock_only:
+            params["low_stock_threshold"] = LOW_STOCK_THRESHOLD
+        
+        response = make_api_request("GET", "/inventory/items/", params=params)
         
         if response["success"]:
             items = response["data"]
             if items:
-                df = pd.DataFrame(items)
-                st.dataframe(df, use_container_width=True)
+                # Category / supplier names arrive embedded, no per-row lookups needed
+                df = pd.json_normalize(items)
+                df = df.drop(columns=["category.description", "supplier.contact_info", "supplier.address"], errors="ignore")
+                df = df.rename(columns={"category.name": "category", "supplier.name": "supplier"})
+                st.dataframe(df.drop(columns=["category.id", "supplier.id"], errors="ignore"), use_container_width=True)
                 
                 # Item details
                 if st.checkbox("Show Item Details"):
@@ -168,9 +235,11 @@ def show_items():
                                                options=[f"{item['id']} - {item['name']}" for item in items])
                     if selected_item:
                         item_id = int(selected_item.split(" - ")[0])
-                        item_detail = make_api_request("GET", f"/inventory/items/{item_id}")
+                        item_detail = make_api_request("GET", f"/inventory/items/{item_id}", params={"expand": "category,supplier"})
                         if item_detail["success"]:
                             item = item_detail["data"]
+                            category = item.get("category") or {}
+                            supplier = item.get("supplier") or {}
                             col1, col2 = st.columns(2)
                             with col1:
                                 st.write("**Name:**", item["name"])
@@ -178,8 +247,8 @@ def show_items():
                                 st.write("**Quantity:**", item["quantity"])
                                 st.write("**Price:**", f"${item['price']:.2f}")
                             with col2:
-                                st.write("**Category ID:**", item["category_id"])
-                                st.write("**Supplier ID:**", item["supplier_id"])
+                                st.write("**Category:**", f"{item['category_id']} - {category.get('name', 'N/A')}")
+                                st.write("**Supplier:**", f"{item['supplier_id']} - {supplier.get('name', 'N/A')}")
                                 st.write("**Created:**", item["created_at"])
                                 st.write("**Updated:**", item["updated_at"])
             else:
@@ -204,6 +273,8 @@ def show_items():
                 name = st.text_input("Item Name*", placeholder="Enter item name")
                 description = st.text_area("Description", placeholder="Optional description")
                 quantity = st.number_input("Quantity*", min_value=0, value=0)
+                reorder_threshold = st.number_input("Reorder Threshold", min_value=0, value=LOW_STOCK_THRESHOLD,
+                                                    help="Alert when stock drops below this")
             
             with col2:
                 price = st.number_input("Price*", min_value=0.0, value=0.0, format="%.2f")
@@ -233,6 +304,7 @@ def show_items():
                         "description": description,
                         "quantity": quantity,
                         "price": price,
+                        "reorder_threshold": reorder_threshold,
                         "category_id": category_id,
                         "supplier_id": supplier_id
                     }
@@ -267,6 +339,10 @@ def show_items():
                             name = st.text_input("Item Name", value=selected_item["name"])
                             description = st.text_area("Description", value=selected_item.get("description", ""))
                             quantity = st.number_input("Quantity", value=selected_item["quantity"])
+                            reorder_threshold = st.number_input(
+                                "Reorder Threshold", min_value=0,
+                                value=selected_item.get("reorder_threshold") or LOW_STOCK_THRESHOLD,
+                            )
                         
                         with col2:
                             price = st.number_input("Price", value=selected_item["price"], format="%.2f")
@@ -285,6 +361,7 @@ def show_items():
                                 "description": description,
                                 "quantity": quantity,
                                 "price": price,
+                                "reorder_threshold": reorder_threshold,
                                 "category_id": category_id,
                                 "supplier_id": supplier_id
                             }
@@ -435,24 +512,21 @@ def show_reports():
     """Display reports and analytics"""
     st.markdown('<h1 class="main-header">📊 Reports & Analytics</h1>', unsafe_allow_html=True)
     
-    # Get all data
-    items_response = make_api_request("GET", "/inventory/items/")
+    # Aggregates are computed by the API; only chart-sized data comes back
+    valuation_response = make_api_request("GET", "/inventory/stats/valuation", params={"buckets": 20})
     
-    if not items_response["success"]:
+    if not valuation_response["success"]:
         display_error("Unable to load reports data")
         return
     
-    items = items_response["data"]
+    valuation = valuation_response["data"]
     
-    if not items:
+    if not valuation["total_items"]:
         st.info("No data available for reports")
         return
     
-    df = pd.DataFrame(items)
-    df["total_value"] = df["quantity"] * df["price"]
-    
     # Report tabs
-    tab1, tab2, tab3 = st.tabs(["📈 Stock Analysis", "💰 Value Analysis", "⚠️ Alerts"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📈 Stock Analysis", "💰 Value Analysis", "⚠️ Alerts", "📅 History"])
     
     with tab1:
         st.subheader("Stock Analysis")
@@ -461,15 +535,18 @@ def show_reports():
         
         with col1:
             # Stock distribution
-            fig = px.histogram(df, x="quantity", nbins=20, title="Stock Quantity Distribution")
+            histogram = pd.DataFrame(valuation["quantity_histogram"])
+            histogram["range"] = histogram["lower"].round(0).astype(int).astype(str) + "–" + histogram["upper"].round(0).astype(int).astype(str)
+            fig = px.bar(histogram, x="range", y="count", title="Stock Quantity Distribution")
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Top items by stock
-            top_stock = df.nlargest(10, "quantity")
-            fig = px.bar(top_stock, x="name", y="quantity", title="Top 10 Items by Stock")
-            fig.update_xaxes(tickangle=45)
-            st.plotly_chart(fig, use_container_width=True)
+            top_stock_response = make_api_request("GET", "/inventory/stats/top-items", params={"by": "quantity", "limit": 10})
+            if top_stock_response["success"] and top_stock_response["data"]:
+                fig = px.bar(pd.DataFrame(top_stock_response["data"]), x="name", y="quantity", title="Top 10 Items by Stock")
+                fig.update_xaxes(tickangle=45)
+                st.plotly_chart(fig, use_container_width=True)
     
     with tab2:
         st.subheader("Value Analysis")
@@ -478,45 +555,82 @@ def show_reports():
         
         with col1:
             # Value distribution
-            fig = px.histogram(df, x="total_value", nbins=20, title="Item Value Distribution")
+            histogram = pd.DataFrame(valuation["value_histogram"])
+            histogram["range"] = histogram["lower"].map("${:,.0f}".format) + "–" + histogram["upper"].map("${:,.0f}".format)
+            fig = px.bar(histogram, x="range", y="count", title="Item Value Distribution")
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
-            # Price vs Quantity scatter
-            fig = px.scatter(df, x="quantity", y="price", size="total_value", 
-                           hover_data=["name"], title="Price vs Quantity")
-            st.plotly_chart(fig, use_container_width=True)
+            # Top items by value
+            top_value_response = make_api_request("GET", "/inventory/stats/top-items", params={"by": "value", "limit": 10})
+            if top_value_response["success"] and top_value_response["data"]:
+                fig = px.bar(pd.DataFrame(top_value_response["data"]), x="name", y="total_value", title="Top 10 Items by Value")
+                fig.update_xaxes(tickangle=45)
+                st.plotly_chart(fig, use_container_width=True)
         
         # Summary statistics
         st.subheader("Summary Statistics")
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Average Price", f"${df['price'].mean():.2f}")
+            st.metric("Average Price", f"${valuation['average_price']:.2f}")
         with col2:
-            st.metric("Average Quantity", f"{df['quantity'].mean():.0f}")
+            st.metric("Average Quantity", f"{valuation['average_quantity']:.0f}")
         with col3:
-            st.metric("Total Items", len(df))
+            st.metric("Total Items", valuation["total_items"])
         with col4:
-            st.metric("Total Value", f"${df['total_value'].sum():,.2f}")
+            st.metric("Total Value", f"${valuation['total_value']:,.2f}")
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Median Item Value", f"${valuation['value_p50']:,.2f}")
+        col2.metric("90th Percentile", f"${valuation['value_p90']:,.2f}")
+        col3.metric("99th Percentile", f"${valuation['value_p99']:,.2f}")
     
     with tab3:
         st.subheader("Inventory Alerts")
         
-        # Low stock items
-        low_stock = df[df["quantity"] < 10]
-        if not low_stock.empty:
-            st.warning(f"⚠️ {len(low_stock)} items have low stock (< 10 units)")
+        # Low stock items (filtered server-side)
+        stats_response = make_api_request("GET", "/inventory/stats", params={"low_stock_threshold": LOW_STOCK_THRESHOLD})
+        low_stock_response = make_api_request("GET", "/inventory/stats/low-stock", params={"low_stock_threshold": LOW_STOCK_THRESHOLD})
+        low_stock_count = stats_response["data"]["low_stock_items"] if stats_response["success"] else 0
+        if low_stock_count and low_stock_response["success"]:
+            low_stock = pd.DataFrame(low_stock_response["data"])
+            st.warning(f"⚠️ {low_stock_count} items are below their reorder threshold")
             st.dataframe(low_stock[["name", "quantity", "price", "total_value"]], use_container_width=True)
         else:
             st.success("✅ All items have adequate stock levels")
         
         # High value items
         st.subheader("High Value Items (Top 10%)")
-        high_value_threshold = df["total_value"].quantile(0.9)
-        high_value_items = df[df["total_value"] >= high_value_threshold]
-        if not high_value_items.empty:
+        high_value_response = make_api_request("GET", "/inventory/stats/top-items", params={"by": "value", "limit": 100})
+        if high_value_response["success"] and high_value_response["data"]:
+            high_value_items = pd.DataFrame(high_value_response["data"])
+            high_value_items = high_value_items[high_value_items["total_value"] >= valuation["value_p90"]]
             st.dataframe(high_value_items[["name", "quantity", "price", "total_value"]], use_container_width=True)
+    
+    with tab4:
+        st.subheader("Stock History")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            as_of_date = st.date_input("Inventory as of", value=datetime.utcnow().date())
+        as_of = datetime.combine(as_of_date, datetime.max.time())
+        totals_response = make_api_request("GET", "/inventory/stats/as-of", params={"at": as_of.isoformat()})
+        if totals_response["success"]:
+            totals = totals_response["data"]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Items", totals["total_items"])
+            col2.metric("Units in Stock", f"{totals['total_stock']:,}")
+            col3.metric("Stock Value", f"${totals['total_value']:,.2f}")
+        
+        item_id = st.number_input("Item ID", min_value=1, step=1)
+        history_response = make_api_request("GET", f"/inventory/items/{int(item_id)}/history", params={"end": as_of_date.isoformat()})
+        if history_response["success"] and history_response["data"]:
+            history = pd.DataFrame(history_response["data"])
+            fig = px.line(history, x="day", y="quantity", line_shape="hv", title=f"Closing Stock of Item {int(item_id)}")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No stock history for this item in the selected period")
 
 # 🎛️ Main App
 def main():
@@ -550,7 +664,7 @@ def main():
     st.sidebar.subheader("🔌 Connection Status")
     
     # Test API connection
-    test_response = make_api_request("GET", "/inventory/items/")
+    test_response = make_api_request("GET", "/")
     if test_response["success"]:
         st.sidebar.success("✅ API Connected")
     else:
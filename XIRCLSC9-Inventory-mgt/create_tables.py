@@ -1,8 +1,8 @@
+from alembic import command
+from alembic.config import Config
+from app.database import ALEMBIC_INI
 
-from app.database import engine
-from app import models
-
-# 👇 This will create all tables in the database
-print("📦 Creating tables in PostgreSQL...")
-models.Base.metadata.create_all(bind=engine)
-print("✅ All tables created successfully.")
\ No newline at end of file
+# 👇 Applies every pending migration (same as `alembic upgrade head`); run once per deploy
+print("📦 Migrating the database schema...")
+command.upgrade(Config(str(ALEMBIC_INI)), "head")
+print("✅ Database schema is up to date.")
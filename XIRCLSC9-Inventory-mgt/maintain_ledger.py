@@ -0,0 +1,72 @@
+# maintain_ledger.py
+"""Partition upkeep and retention for the stock_transactions ledger (PostgreSQL).
+
+    python maintain_ledger.py                      # create upcoming partitions, then archive old ones
+    python maintain_ledger.py partitions --ahead 6
+    python maintain_ledger.py archive --retention-months 24 --dry-run
+
+Meant to run daily from cron. Archived months are written to ARCHIVE_DIR (see
+app/ledger.py for the format), dropped from the database and remain readable
+through GET /inventory/items/{id}/transactions/archive. Both steps are safe to
+re-run after an interruption.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+import asyncpg
+
+from app import ledger
+from app.database import postgres_dsn
+from app.settings import settings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=["all", "partitions", "archive"], default="all")
+    parser.add_argument("--ahead", type=int, default=settings.LEDGER_PARTITIONS_AHEAD,
+                        help="months of partitions to keep ready beyond the current one")
+    parser.add_argument("--retention-months", type=int, default=settings.LEDGER_RETENTION_MONTHS,
+                        help="months kept in the database, the current one included")
+    parser.add_argument("--archive-dir", default=settings.ARCHIVE_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="only print what would be done")
+    return parser.parse_args()
+
+
+async def archive_partitions(pg: asyncpg.Connection, args):
+    cutoff = ledger.add_months(ledger.month_start(datetime.utcnow().date()), 1 - args.retention_months)
+    for month, name in sorted((await ledger.partition_months(pg)).items()):
+        if month >= cutoff:
+            break
+        print(f"📦 {name} → {args.archive_dir}")
+        if args.dry_run:
+            continue
+        writer = ledger.ArchiveWriter(args.archive_dir, name, settings.ARCHIVE_BLOCK_ROWS)
+        async with pg.transaction():
+            columns = ", ".join(ledger.LEDGER_COLUMNS)
+            query = f"SELECT {columns} FROM {name} ORDER BY coalesce(item_id, 0), timestamp, id"
+            async for record in pg.cursor(query):
+                writer.add(record)
+        writer.close(month, ledger.add_months(month, 1))
+        # the archive is complete on disk before the rows leave the database
+        async with pg.transaction():
+            for statement in ledger.drop_partition_statements(name):
+                await pg.execute(statement)
+        print(f"   {writer.rows:,} rows archived")
+
+
+async def main(args):
+    pg = await asyncpg.connect(postgres_dsn())
+    try:
+        if args.command in ("all", "partitions"):
+            current = ledger.month_start(datetime.utcnow().date())
+            for name in await ledger.ensure_partitions(pg, current, ledger.add_months(current, args.ahead), args.dry_run):
+                print(f"➕ {name}")
+        if args.command in ("all", "archive"):
+            await archive_partitions(pg, args)
+    finally:
+        await pg.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
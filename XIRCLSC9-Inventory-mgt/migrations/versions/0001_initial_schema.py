@@ -0,0 +1,78 @@
+"""initial schema (tables as created by the old create_all on startup)
+
+Databases created before migrations existed already match this revision:
+mark them with `alembic stamp 0001`, then run `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-07-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+
+    op.create_table(
+        "suppliers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("contact_info", sa.String()),
+        sa.Column("address", sa.Text()),
+    )
+    op.create_index("ix_suppliers_id", "suppliers", ["id"])
+
+    op.create_table(
+        "items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id")),
+        sa.Column("supplier_id", sa.Integer(), sa.ForeignKey("suppliers.id")),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_items_id", "items", ["id"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False, unique=True),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", sa.String()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "stock_transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("item_id", sa.Integer(), sa.ForeignKey("items.id")),
+        sa.Column("change_type", sa.String(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("timestamp", sa.DateTime()),
+        sa.Column("notes", sa.Text()),
+    )
+    op.create_index("ix_stock_transactions_id", "stock_transactions", ["id"])
+
+
+def downgrade():
+    op.drop_table("stock_transactions")
+    op.drop_table("users")
+    op.drop_table("items")
+    op.drop_table("suppliers")
+    op.drop_table("categories")
@@ -0,0 +1,50 @@
+"""item upsert key, search / keyset indexes and refresh tokens
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-07-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+ITEM_INDEXES = {
+    "ix_items_category_id_price": ["category_id", "price"],
+    "ix_items_supplier_id_price": ["supplier_id", "price"],
+    "ix_items_quantity_id": ["quantity", "id"],
+    "ix_items_price_id": ["price", "id"],
+    "ix_items_name_id": ["name", "id"],
+    "ix_items_updated_at_id": ["updated_at", "id"],
+    "ix_items_name_lower_prefix": [sa.text("lower(name) text_pattern_ops")],
+}
+
+
+def upgrade():
+    op.create_unique_constraint("uq_items_name_supplier", "items", ["name", "supplier_id"])
+    # built CONCURRENTLY so a large items table keeps taking writes meanwhile
+    with op.get_context().autocommit_block():
+        for name, columns in ITEM_INDEXES.items():
+            op.create_index(name, "items", columns, postgresql_concurrently=True, if_not_exists=True)
+
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("token_hash", sa.LargeBinary(32), nullable=False, unique=True),
+        sa.Column("family_id", sa.LargeBinary(16), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime()),
+    )
+    op.create_index("ix_refresh_tokens_family_id", "refresh_tokens", ["family_id"])
+
+
+def downgrade():
+    op.drop_table("refresh_tokens")
+    for name in ITEM_INDEXES:
+        op.drop_index(name, table_name="items")
+    op.drop_constraint("uq_items_name_supplier", "items", type_="unique")
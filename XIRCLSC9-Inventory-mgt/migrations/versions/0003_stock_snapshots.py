@@ -0,0 +1,32 @@
+"""per-item daily stock snapshots
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-07-08
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "stock_snapshots",
+        sa.Column("item_id", sa.Integer(), sa.ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=False),
+    )
+    # start from today's stock; older days can be filled with crud.rebuild_stock_snapshots
+    op.execute(
+        "INSERT INTO stock_snapshots (item_id, day, quantity, value) "
+        "SELECT id, CAST(timezone('UTC', now()) AS date), quantity, quantity * price FROM items"
+    )
+
+
+def downgrade():
+    op.drop_table("stock_snapshots")
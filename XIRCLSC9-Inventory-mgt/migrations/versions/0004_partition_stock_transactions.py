@@ -0,0 +1,92 @@
+"""partition stock_transactions by month
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-07-15
+
+The ledger is rebuilt as ``PARTITION BY RANGE (timestamp)``: the old table is
+renamed, the partitioned one created with one partition per month that holds
+data (plus a few ahead and a default partition), and the rows copied over.
+Takes an exclusive lock on the ledger for the duration of the copy.
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade():
+    op.execute("ALTER TABLE stock_transactions RENAME TO stock_transactions_legacy")
+    op.execute("ALTER INDEX ix_stock_transactions_id RENAME TO ix_stock_transactions_legacy_id")
+    op.execute("ALTER TABLE stock_transactions_legacy RENAME CONSTRAINT stock_transactions_pkey TO stock_transactions_legacy_pkey")
+
+    op.execute("""
+        CREATE TABLE stock_transactions (
+            id integer NOT NULL DEFAULT nextval('stock_transactions_id_seq'),
+            item_id integer REFERENCES items (id),
+            change_type varchar NOT NULL,
+            quantity integer NOT NULL,
+            user_id integer REFERENCES users (id),
+            timestamp timestamp without time zone NOT NULL,
+            notes text,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("ALTER SEQUENCE stock_transactions_id_seq OWNED BY stock_transactions.id")
+    op.execute("CREATE TABLE stock_transactions_default PARTITION OF stock_transactions DEFAULT")
+
+    oldest = op.get_bind().execute(sa.text("SELECT min(timestamp) FROM stock_transactions_legacy")).scalar()
+    today = datetime.utcnow().date()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE stock_transactions_y{month.year:04d}m{month.month:02d} PARTITION OF stock_transactions "
+            f"FOR VALUES FROM ('{month}') TO ('{upper}')"
+        )
+        month = upper
+
+    op.execute("""
+        INSERT INTO stock_transactions (id, item_id, change_type, quantity, user_id, timestamp, notes)
+        SELECT id, item_id, change_type, quantity, user_id, coalesce(timestamp, timezone('UTC', now())), notes
+        FROM stock_transactions_legacy
+    """)
+    op.execute("DROP TABLE stock_transactions_legacy")
+    op.create_index("ix_stock_transactions_item_id_timestamp", "stock_transactions", ["item_id", "timestamp", "id"])
+
+
+def downgrade():
+    op.execute("ALTER TABLE stock_transactions RENAME TO stock_transactions_partitioned")
+    op.create_table(
+        "stock_transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("item_id", sa.Integer(), sa.ForeignKey("items.id")),
+        sa.Column("change_type", sa.String(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("timestamp", sa.DateTime()),
+        sa.Column("notes", sa.Text()),
+    )
+    op.create_index("ix_stock_transactions_id", "stock_transactions", ["id"])
+    op.execute("""
+        INSERT INTO stock_transactions (id, item_id, change_type, quantity, user_id, timestamp, notes)
+        SELECT id, item_id, change_type, quantity, user_id, timestamp, notes FROM stock_transactions_partitioned
+    """)
+    op.execute("DROP TABLE stock_transactions_partitioned CASCADE")
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('stock_transactions', 'id'), "
+        "GREATEST((SELECT max(id) FROM stock_transactions), 1))"
+    )
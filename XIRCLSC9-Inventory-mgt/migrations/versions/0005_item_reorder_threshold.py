@@ -0,0 +1,22 @@
+"""per-item reorder threshold
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-07-22
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # nullable without a default: a metadata-only change, no table rewrite
+    op.add_column("items", sa.Column("reorder_threshold", sa.Integer()))
+
+
+def downgrade():
+    op.drop_column("items", "reorder_threshold")
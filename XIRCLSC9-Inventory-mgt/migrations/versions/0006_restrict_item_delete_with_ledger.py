@@ -0,0 +1,29 @@
+"""keep items that have ledger rows
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-07-29
+
+stock_transactions.item_id had no ON DELETE rule and the ORM nulled it out
+when an item was deleted, orphaning its history. The foreign key becomes
+ON DELETE RESTRICT (recreated on every partition by PostgreSQL); rows that
+were already orphaned keep item_id NULL.
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+FK_NAME = "stock_transactions_item_id_fkey"
+
+
+def upgrade():
+    op.drop_constraint(FK_NAME, "stock_transactions", type_="foreignkey")
+    op.create_foreign_key(FK_NAME, "stock_transactions", "items", ["item_id"], ["id"], ondelete="RESTRICT")
+
+
+def downgrade():
+    op.drop_constraint(FK_NAME, "stock_transactions", type_="foreignkey")
+    op.create_foreign_key(FK_NAME, "stock_transactions", "items", ["item_id"], ["id"])
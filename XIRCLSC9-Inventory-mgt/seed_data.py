@@ -1,71 +1,190 @@
 # seed_data.py
-from app.database import SessionLocal
-from app import models
-from datetime import datetime
-
-db = SessionLocal()
-
-# -------------------------
-# 📦 Add Categories
-# -------------------------
-categories = [
-    models.Category(name="Electronics", description="Electronic Items"),
-    models.Category(name="Stationery", description="Office supplies and papers"),
-    models.Category(name="Furniture", description="Chairs, tables, and desks"),
-    models.Category(name="Groceries", description="Daily grocery essentials"),
-]
-db.add_all(categories)
-db.commit()
-
-# -------------------------
-# 🚚 Add Suppliers
-# -------------------------
-suppliers = [
-    models.Supplier(name="ABC Corp", contact_info="abc@example.com", address="123 Tech Road"),
-    models.Supplier(name="XYZ Traders", contact_info="xyz@example.com", address="45 Market Lane"),
-    models.Supplier(name="GlobalTech", contact_info="global@example.com", address="78 Silicon Ave"),
-    models.Supplier(name="OfficeNeeds", contact_info="office@example.com", address="23 Stationery St"),
-]
-db.add_all(suppliers)
-db.commit()
-
-# -------------------------
-# 📦 Add Items
-# -------------------------
-items = [
-    models.Item(name="Laptop", description="HP EliteBook", quantity=10, price=75000, category_id=1, supplier_id=1),
-    models.Item(name="Notebook", description="200 pages", quantity=100, price=30, category_id=2, supplier_id=2),
-    models.Item(name="Office Chair", description="Ergonomic", quantity=15, price=4500, category_id=3, supplier_id=3),
-    models.Item(name="LED Monitor", description="24 inch full HD", quantity=8, price=12000, category_id=1, supplier_id=3),
-    models.Item(name="Pen Pack", description="10 blue pens", quantity=50, price=120, category_id=2, supplier_id=4),
-    models.Item(name="Rice Bag", description="10kg Basmati", quantity=25, price=650, category_id=4, supplier_id=2),
-]
-db.add_all(items)
-db.commit()
-
-# -------------------------
-# 👥 Add Users
-# -------------------------
-users = [
-    models.User(username="admin", hashed_password="admin123", role="admin"),
-    models.User(username="viewer", hashed_password="viewer123", role="viewer"),
-]
-db.add_all(users)
-db.commit()
-
-# -------------------------
-# 🔄 Stock Transactions
-# -------------------------
-transactions = [
-    models.StockTransaction(item_id=1, change_type="add", quantity=5, user_id=1, notes="Initial stock"),
-    models.StockTransaction(item_id=2, change_type="add", quantity=50, user_id=1, notes="Notebook arrival"),
-    models.StockTransaction(item_id=3, change_type="remove", quantity=2, user_id=2, notes="Damaged chairs"),
-    models.StockTransaction(item_id=4, change_type="add", quantity=3, user_id=1, notes="New monitor shipment"),
-    models.StockTransaction(item_id=5, change_type="adjust", quantity=1, user_id=1, notes="Inventory correction"),
-    models.StockTransaction(item_id=6, change_type="remove", quantity=5, user_id=2, notes="Customer purchase"),
-]
-db.add_all(transactions)
-db.commit()
-
-db.close()
-print("✅ Seed data inserted successfully!")
+"""Deterministic, idempotent load-test data generator (PostgreSQL).
+
+    python seed_data.py                                   # small demo dataset
+    python seed_data.py --items 200000 --transactions 10000000 --distribution zipf --seed 7
+
+Every row gets a fixed id derived from its position, and all values come from
+one seeded RNG, so the same arguments always produce the same data. Rows are
+bulk-loaded with COPY into a temp staging table and merged with
+``INSERT ... ON CONFLICT DO NOTHING``; ledger chunks that are already complete
+are skipped, so an interrupted run can simply be started again.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import asyncpg
+
+from app import ledger
+from app.auth.auth_handler import pwd_context
+from app.crud import REBUILD_STOCK_SNAPSHOTS_SQL
+from app.database import postgres_dsn
+
+CHUNK_ROWS = 100_000
+
+CATEGORY_NAMES = ["Electronics", "Stationery", "Furniture", "Groceries", "Hardware", "Apparel", "Toys", "Health"]
+SUPPLIER_NAMES = ["ABC Corp", "XYZ Traders", "GlobalTech", "OfficeNeeds", "Prime Supply", "Metro Wholesale"]
+
+# (change_type, share of movements)
+MOVEMENT_MIX = [("add", 0.40), ("remove", 0.55), ("adjust", 0.05)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--suppliers", type=int, default=12)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--transactions", type=int, default=5_000)
+    parser.add_argument("--distribution", choices=["uniform", "zipf"], default="zipf",
+                        help="how movements are spread over items")
+    parser.add_argument("--skew", type=float, default=1.1, help="zipf exponent (higher = hotter top items)")
+    parser.add_argument("--days", type=int, default=365, help="ledger history length")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=datetime(2025, 7, 1),
+                        help="timestamp of the newest movement")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+async def merge_rows(pg: asyncpg.Connection, table: str, columns: list, records: list):
+    """COPY ``records`` into a staging table and insert the ones not present yet."""
+    staging = f"seed_{table}"
+    column_list = ", ".join(columns)
+    async with pg.transaction():
+        await pg.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        await pg.copy_records_to_table(staging, records=records, columns=columns)
+        await pg.execute(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} ON CONFLICT DO NOTHING"
+        )
+
+
+async def sync_sequence(pg: asyncpg.Connection, table: str):
+    await pg.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT max(id) FROM {table}), 1))"
+    )
+
+
+def item_picker(rng: random.Random, args):
+    item_ids = list(range(1, args.items + 1))
+    if args.distribution == "uniform":
+        return lambda k: rng.choices(item_ids, k=k)
+    # zipf over a shuffled ranking, so the hot items are not simply the lowest ids
+    ranking = item_ids[:]
+    rng.shuffle(ranking)
+    cumulative, total = [], 0.0
+    for rank in range(1, len(ranking) + 1):
+        total += 1.0 / rank ** args.skew
+        cumulative.append(total)
+    return lambda k: rng.choices(ranking, cum_weights=cumulative, k=k)
+
+
+def next_movement(rng: random.Random, balance: int):
+    change_type = rng.choices([kind for kind, _ in MOVEMENT_MIX], weights=[share for _, share in MOVEMENT_MIX])[0]
+    if change_type == "remove" and balance == 0:
+        change_type = "add"
+    if change_type == "add":
+        quantity = rng.randint(1, 50)
+        return change_type, quantity, quantity
+    if change_type == "remove":
+        quantity = rng.randint(1, min(balance, 10))
+        return change_type, quantity, -quantity
+    delta = rng.choice([-3, -2, -1, 1, 2, 3])
+    delta = max(delta, -balance) or 1
+    return change_type, delta, delta
+
+
+async def seed(args):
+    rng = random.Random(args.seed)
+    start = args.end - timedelta(days=args.days)
+    pg = await asyncpg.connect(postgres_dsn())
+    started = time.perf_counter()
+    try:
+        # -------------------------
+        # 👥 Users
+        # -------------------------
+        for username, password, role in [("admin", "admin123", "admin"), ("viewer", "viewer123", "viewer")]:
+            await pg.execute(
+                "INSERT INTO users (username, hashed_password, role) VALUES ($1, $2, $3) "
+                "ON CONFLICT (username) DO NOTHING",
+                username, pwd_context.hash(password), role,
+            )
+        user_ids = [row["id"] for row in await pg.fetch(
+            "SELECT id FROM users WHERE username IN ('admin', 'viewer') ORDER BY id"
+        )]
+
+        # -------------------------
+        # 📦 Categories & 🚚 Suppliers
+        # -------------------------
+        await merge_rows(pg, "categories", ["id", "name", "description"], [
+            (i, f"{CATEGORY_NAMES[(i - 1) % len(CATEGORY_NAMES)]} {i}", f"Seeded category {i}")
+            for i in range(1, args.categories + 1)
+        ])
+        await merge_rows(pg, "suppliers", ["id", "name", "contact_info", "address"], [
+            (i, f"{SUPPLIER_NAMES[(i - 1) % len(SUPPLIER_NAMES)]} {i}", f"supplier{i}@example.com", f"{i} Market Lane")
+            for i in range(1, args.suppliers + 1)
+        ])
+
+        # -------------------------
+        # 📦 Items (quantity is set from the generated ledger at the end)
+        # -------------------------
+        for first in range(1, args.items + 1, CHUNK_ROWS):
+            last = min(first + CHUNK_ROWS - 1, args.items)
+            await merge_rows(pg, "items", [
+                "id", "name", "description", "quantity", "price", "category_id", "supplier_id", "created_at", "updated_at",
+            ], [
+                (
+                    i, f"Item {i:07d}", f"Seeded item {i}", 0, round(rng.lognormvariate(5, 1.2), 2),
+                    rng.randint(1, args.categories), rng.randint(1, args.suppliers), start, start,
+                )
+                for i in range(first, last + 1)
+            ])
+
+        # -------------------------
+        # 🔄 Stock Transactions
+        # -------------------------
+        # monthly ledger partitions covering the generated history
+        await ledger.ensure_partitions(pg, start.date(), args.end.date())
+
+        balances = [0] * (args.items + 1)
+        pick_items = item_picker(rng, args)
+        step = timedelta(days=args.days) / max(args.transactions, 1)
+        for first in range(1, args.transactions + 1, CHUNK_ROWS):
+            last = min(first + CHUNK_ROWS - 1, args.transactions)
+            records = []
+            for txn_id, item_id in zip(range(first, last + 1), pick_items(last - first + 1)):
+                change_type, quantity, delta = next_movement(rng, balances[item_id])
+                balances[item_id] += delta
+                records.append((
+                    txn_id, item_id, change_type, quantity, rng.choice(user_ids),
+                    start + step * txn_id, "seed",
+                ))
+            # generating is cheap; only write chunks that are not fully in the table yet
+            present = await pg.fetchval("SELECT count(*) FROM stock_transactions WHERE id BETWEEN $1 AND $2", first, last)
+            if present < len(records):
+                await merge_rows(pg, "stock_transactions", [
+                    "id", "item_id", "change_type", "quantity", "user_id", "timestamp", "notes",
+                ], records)
+            print(f"   ledger {last:,}/{args.transactions:,} rows ({time.perf_counter() - started:.0f}s)")
+
+        await pg.execute(
+            "UPDATE items SET quantity = b.quantity, updated_at = $3 "
+            "FROM unnest($1::int[], $2::int[]) AS b(id, quantity) WHERE items.id = b.id",
+            list(range(1, args.items + 1)), balances[1:], args.end,
+        )
+        # daily closing stock for the whole generated history
+        await pg.execute(REBUILD_STOCK_SNAPSHOTS_SQL)
+
+        for table in ("categories", "suppliers", "items", "stock_transactions"):
+            await sync_sequence(pg, table)
+    finally:
+        await pg.close()
+
+    print(f"✅ Seeded {args.items:,} items and {args.transactions:,} transactions in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(seed(parse_args()))
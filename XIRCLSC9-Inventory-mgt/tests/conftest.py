@@ -0,0 +1,20 @@
+# tests/conftest.py
+"""Tests run against a throwaway SQLite file; no PostgreSQL needed.
+
+The environment is set before ``app`` is imported because app.settings and
+app.database read it at import time.
+"""
+import os
+import tempfile
+
+TEST_DB = os.path.join(tempfile.mkdtemp(prefix="inventory-tests-"), "inventory.db")
+
+os.environ.update(
+    DATABASE_URL=f"sqlite+aiosqlite:///{TEST_DB}",
+    DB_USER="test",
+    DB_PASSWORD="test",
+    SECRET_KEY="test",
+    ALGORITHM="HS256",
+    ACCESS_TOKEN_EXPIRE_MINUTES="5",
+    DB_SCHEMA_CHECK="false",
+)
@@ -0,0 +1,39 @@
+# tests/support.py
+"""Shared setup for tests that need item tables in the SQLite test database."""
+from sqlalchemy import event
+
+from app import models
+from app.database import Base, engine
+
+# only what items need: the partitioned ledger does not exist on SQLite
+ITEM_TABLES = [models.Category.__table__, models.Supplier.__table__, models.Item.__table__]
+
+
+async def reset_item_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=ITEM_TABLES)
+        await conn.run_sync(Base.metadata.create_all, tables=ITEM_TABLES)
+
+
+async def insert_rows(table, rows, chunk: int = 50_000):
+    async with engine.begin() as conn:
+        for start in range(0, len(rows), chunk):
+            await conn.execute(table.insert(), rows[start:start + chunk])
+
+
+async def query_plan(run) -> str:
+    """SQLite's EXPLAIN QUERY PLAN for the last statement the coroutine ``run()`` executes."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        await run()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    statement, parameters = captured[-1]
+    async with engine.connect() as conn:
+        rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+    return "\n".join(row[-1] for row in rows)
@@ -0,0 +1,74 @@
+# tests/test_change_feed_replay.py
+"""Ledger catch-up in GET /inventory/changes survives rows the schema would once reject."""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from app import crud, events
+from app.routers import changes
+from app.settings import settings
+
+
+def _transaction(id, **overrides):
+    row = dict(id=id, item_id=1, change_type="add", quantity=1, user_id=1, timestamp=datetime(2025, 7, 1), notes=None)
+    return SimpleNamespace(**{**row, **overrides})
+
+
+def _use_ledger(monkeypatch, ledger):
+    queries = []
+
+    async def get_stock_transactions_after(db, after_id, limit):
+        queries.append(after_id)
+        return [row for row in ledger if row.id > after_id][:limit]
+
+    monkeypatch.setattr(crud, "get_stock_transactions_after", get_stock_transactions_after)
+    return queries
+
+
+def _replay(prefixes=()):
+    async def run():
+        replayed = []
+        async for event in changes._change_events(-1, 10, prefixes):
+            replayed.append(event)
+            if event["type"] == "reset":
+                return replayed
+    return asyncio.run(run())
+
+
+def test_replay_keeps_null_rows_and_skips_unreadable_ones(monkeypatch):
+    _use_ledger(monkeypatch, [
+        _transaction(11, user_id=None),             # movement recorded without a user
+        _transaction(12, item_id=None),             # orphaned by an old item delete
+        _transaction(13, quantity="not a number"),  # unreadable: skipped, stream goes on
+        _transaction(14),
+    ])
+
+    replayed = _replay()
+    movements = [event for event in replayed if event["type"] == "stock.movement"]
+    assert [event["data"]["id"] for event in movements] == [11, 12, 14]
+    assert movements[0]["data"]["user_id"] is None
+    assert movements[1]["data"]["item_id"] is None
+    assert replayed[-1]["data"]["replayed"] == 4
+    assert replayed[-1]["ledger_id"] == 14
+
+
+def test_replay_honours_type_prefixes(monkeypatch):
+    queries = _use_ledger(monkeypatch, [_transaction(11), _transaction(12)])
+    monkeypatch.setattr(events.changes, "ledger_watermark", 20)
+
+    assert [event["type"] for event in _replay(("stock",))] == ["stock.movement", "stock.movement", "reset"]
+    filtered = _replay(("item", "category"))
+    assert [event["type"] for event in filtered] == ["reset"]
+    assert filtered[-1]["data"]["replayed"] == 0
+    assert filtered[-1]["ledger_id"] == 20
+    assert queries == [10]  # nothing to replay for item/category subscribers
+
+
+def test_truncated_replay_resumes_from_the_last_row_sent(monkeypatch):
+    _use_ledger(monkeypatch, [_transaction(id) for id in range(11, 21)])
+    monkeypatch.setattr(events.changes, "ledger_watermark", 20)
+    monkeypatch.setattr(settings, "CHANGE_FEED_REPLAY_LIMIT", 4)
+
+    replayed = _replay()
+    assert [event["ledger_id"] for event in replayed] == [11, 12, 13, 14, 14]
+    assert replayed[-1]["data"] == {"replayed": 4, "truncated": True}
@@ -0,0 +1,81 @@
+# tests/test_expand_queries.py
+"""?expand= must load relations with the items, not one query per item (N+1)."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models
+from app.database import engine
+from app.main import app
+from tests.support import insert_rows, reset_item_tables
+
+ITEMS = 20
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        client.portal.call(_create_and_seed)
+        yield client
+
+
+async def _create_and_seed():
+    await reset_item_tables()
+    # every item gets its own category and supplier, so lazy loading would cost 2 queries per item
+    await insert_rows(models.Category.__table__, [{"id": n, "name": f"category {n}"} for n in range(1, ITEMS + 1)])
+    await insert_rows(models.Supplier.__table__, [{"id": n, "name": f"supplier {n}"} for n in range(1, ITEMS + 1)])
+    await insert_rows(models.Item.__table__, [
+        {"id": n, "name": f"item {n}", "quantity": n, "price": 1.0, "category_id": n, "supplier_id": n}
+        for n in range(1, ITEMS + 1)
+    ])
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+def test_item_list_expand_is_one_query(client, statements):
+    response = client.get("/inventory/items/", params={"limit": ITEMS, "expand": "category,supplier"})
+    assert response.status_code == 200
+    items = response.json()
+    assert len(items) == ITEMS
+    assert all(item["category"]["id"] == item["category_id"] for item in items)
+    assert all(item["supplier"]["id"] == item["supplier_id"] for item in items)
+    assert len(statements) == 1
+
+
+def test_item_list_without_expand_does_not_load_relations(client, statements):
+    response = client.get("/inventory/items/", params={"limit": ITEMS})
+    assert response.status_code == 200
+    assert all("category" not in item for item in response.json())
+    assert len(statements) == 1
+
+
+def test_item_list_page_expand_is_one_query(client, statements):
+    response = client.get("/inventory/items/", params={"limit": 5, "cursor": "", "expand": "category,supplier"})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 5
+    assert len(statements) == 1
+
+
+def test_single_item_expand_is_one_query(client, statements):
+    response = client.get(f"/inventory/items/{ITEMS}", params={"expand": "supplier"})
+    assert response.status_code == 200
+    assert response.json()["supplier"]["name"] == f"supplier {ITEMS}"
+    assert len(statements) == 1
+
+
+def test_partial_expand_leaves_other_relation_out(client, statements):
+    response = client.get("/inventory/items/", params={"limit": ITEMS, "expand": "category"})
+    assert response.status_code == 200
+    items = response.json()
+    assert all("category" in item and "supplier" not in item for item in items)
+    assert len(statements) == 1
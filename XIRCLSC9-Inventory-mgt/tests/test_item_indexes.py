@@ -0,0 +1,124 @@
+# tests/test_item_indexes.py
+"""The item filters and keyset sorts are answered from their indexes.
+
+Plans are checked on SQLite here. The name-prefix index (lower(name)
+text_pattern_ops) only exists on PostgreSQL: its query is checked against the
+index definition, and EXPLAINed on a 1M-item table when TEST_POSTGRES_URL
+points at a scratch PostgreSQL database.
+"""
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import crud, database, models, schemas
+from app.main import app
+from tests.support import insert_rows, query_plan, reset_item_tables
+
+ITEMS = 20_000
+
+
+@pytest.fixture(scope="module")
+def portal():
+    async def seed():
+        await reset_item_tables()
+        await insert_rows(models.Category.__table__, [{"id": n, "name": f"category {n}"} for n in range(1, 51)])
+        await insert_rows(models.Supplier.__table__, [{"id": n, "name": f"supplier {n}"} for n in range(1, 51)])
+        await insert_rows(models.Item.__table__, [
+            {"id": n, "name": f"item {n}", "quantity": n % 500, "price": float(n % 997),
+             "category_id": n % 50 + 1, "supplier_id": n % 47 + 1}
+            for n in range(1, ITEMS + 1)
+        ])
+        async with database.engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+
+    with TestClient(app) as client:
+        client.portal.call(seed)
+        yield client.portal
+
+
+def plan_for(portal, sort="id", **filters):
+    async def run():
+        async with database.AsyncSessionLocal() as db:
+            await crud.get_items(db, limit=50, sort=sort, filters=schemas.ItemFilter(**filters))
+    return portal.call(query_plan, run)
+
+
+@pytest.mark.parametrize("filters, sort, index", [
+    ({"category_id": 7}, "price", "ix_items_category_id_price (category_id=?)"),
+    ({"category_id": 7, "min_price": 10, "max_price": 20}, "price", "ix_items_category_id_price (category_id=? AND price>? AND price<?)"),
+    ({"supplier_id": 3, "max_price": 50}, "price", "ix_items_supplier_id_price (supplier_id=? AND price<?)"),
+    ({"low_stock_threshold": 5}, "quantity", "ix_items_quantity_id (quantity<?)"),
+])
+def test_filters_search_their_index(portal, filters, sort, index):
+    plan = plan_for(portal, sort=sort, **filters)
+    assert f"SEARCH items USING INDEX {index}" in plan, plan
+
+
+@pytest.mark.parametrize("sort", ["price", "name", "quantity", "updated_at"])
+def test_sorted_pages_read_the_index_in_order(portal, sort):
+    plan = plan_for(portal, sort=sort)
+    assert f"SCAN items USING INDEX ix_items_{sort}_id" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+def _name_prefix_query():
+    stmt = crud._filter_items(crud._select_items(), schemas.ItemFilter(name_prefix="Ab_"))
+    return stmt.compile(dialect=postgresql.dialect())
+
+
+def test_name_prefix_filter_matches_the_index_expression():
+    index = next(index for index in models.Item.__table__.indexes if index.name == "ix_items_name_lower_prefix")
+    indexed = str(index.expressions[0].compile(dialect=postgresql.dialect()))
+    query = _name_prefix_query()
+    # same expression, a LIKE with a constant prefix, and the operator class LIKE needs
+    assert f"{indexed} LIKE %(lower_1)s ESCAPE '\\\\'" in str(query)
+    assert query.params["lower_1"] == "ab\\_%"
+    assert index.dialect_options["postgresql"]["ops"] == {"name_lower": "text_pattern_ops"}
+
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="set TEST_POSTGRES_URL to a scratch PostgreSQL database")
+def test_postgres_uses_the_item_indexes_at_1m_rows():
+    async def run():
+        engine = create_async_engine(POSTGRES_URL)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(database.Base.metadata.drop_all, tables=[models.Item.__table__])
+                await conn.run_sync(database.Base.metadata.create_all, tables=[models.Item.__table__])
+                await conn.execute(text(
+                    "INSERT INTO items (name, quantity, price, category_id, supplier_id, updated_at) "
+                    "SELECT 'item ' || n, n % 500, n % 997, n % 50 + 1, n % 47 + 1, now() "
+                    "FROM generate_series(1, 1000000) AS n"
+                ))
+                await conn.execute(text("ANALYZE items"))
+            plans = {}
+            async with AsyncSession(engine) as db:
+                for name, filters, sort in [
+                    ("name_prefix", {"name_prefix": "item 12345"}, "id"),
+                    ("category", {"category_id": 7, "min_price": 10, "max_price": 20}, "price"),
+                    ("low_stock", {"low_stock_threshold": 1}, "quantity"),
+                ]:
+                    stmt = crud.apply_order(
+                        crud._filter_items(crud._select_items(), schemas.ItemFilter(**filters)),
+                        crud.ITEM_SORT_COLUMNS[sort], models.Item.id,
+                    ).limit(50)
+                    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+                    rows = await db.execute(text(f"EXPLAIN {sql}"))
+                    plans[name] = "\n".join(row[0] for row in rows)
+            async with engine.begin() as conn:
+                await conn.run_sync(database.Base.metadata.drop_all, tables=[models.Item.__table__])
+            return plans
+        finally:
+            await engine.dispose()
+
+    plans = asyncio.run(run())
+    assert "ix_items_name_lower_prefix" in plans["name_prefix"], plans["name_prefix"]
+    assert "ix_items_category_id_price" in plans["category"], plans["category"]
+    assert "ix_items_quantity_id" in plans["low_stock"], plans["low_stock"]
@@ -0,0 +1,36 @@
+# tests/test_ledger_archive.py
+"""Archive files round-trip ledger rows, NULL item_id / user_id included."""
+import gzip
+import json
+from datetime import date, datetime
+
+from app import ledger, schemas
+
+MONTH = date(2025, 1, 1)
+NAME = ledger.partition_name(MONTH)
+
+
+def _row(id, item_id, user_id=1):
+    return {
+        "id": id, "item_id": item_id, "change_type": "add", "quantity": 1,
+        "user_id": user_id, "timestamp": datetime(2025, 1, 1, 12, 0, id), "notes": None,
+    }
+
+
+def test_archive_keeps_nulls(tmp_path):
+    # sorted like maintain_ledger.py does: coalesce(item_id, 0), timestamp, id
+    rows = [_row(1, None, None), _row(2, 3, None), _row(3, 3), _row(4, 5)]
+    writer = ledger.ArchiveWriter(str(tmp_path), NAME, block_rows=2)
+    for row in rows:
+        writer.add(row)
+    writer.close(MONTH, ledger.add_months(MONTH, 1))
+
+    data_path, _ = ledger.archive_paths(str(tmp_path), NAME)
+    stored = [json.loads(line) for line in gzip.open(data_path).read().splitlines()]
+    assert stored[0]["item_id"] is None and stored[0]["user_id"] is None
+
+    archived = ledger.read_archived_transactions(str(tmp_path), 3)
+    assert [row["id"] for row in archived] == [2, 3]
+    # what GET /inventory/items/{id}/transactions/archive validates against
+    assert [schemas.StockTransaction.model_validate(row).user_id for row in archived] == [None, 1]
+    assert ledger.read_archived_transactions(str(tmp_path), 0) == []
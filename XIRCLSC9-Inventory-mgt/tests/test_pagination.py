@@ -0,0 +1,94 @@
+# tests/test_pagination.py
+"""Keyset cursors on GET /inventory/items/: round trips, ordering, tampering."""
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.main import app
+from app.pagination import encode_cursor
+from tests.support import insert_rows, reset_item_tables
+
+ITEMS = 60
+BASE_TIME = datetime(2025, 7, 1, 12, 0)
+# few distinct sort keys, so most page boundaries fall inside a run of ties
+ROWS = [
+    {
+        "id": n, "name": f"item {n:02d}", "quantity": n % 5, "price": float(n % 4),
+        "updated_at": BASE_TIME + timedelta(minutes=n % 7), "category_id": 1, "supplier_id": 1,
+    }
+    for n in range(1, ITEMS + 1)
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    async def seed():
+        await reset_item_tables()
+        await insert_rows(models.Category.__table__, [{"id": 1, "name": "category"}])
+        await insert_rows(models.Supplier.__table__, [{"id": 1, "name": "supplier"}])
+        await insert_rows(models.Item.__table__, ROWS)
+
+    with TestClient(app) as client:
+        client.portal.call(seed)
+        yield client
+
+
+def walk(client, limit=7, **params):
+    """Follow next_cursor from the first page to the last, returning the ids in order."""
+    ids, cursor, pages = [], "", 0
+    while cursor is not None:
+        response = client.get("/inventory/items/", params={**params, "limit": limit, "cursor": cursor})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        pages += 1
+    assert pages == -(-ITEMS // limit)
+    return ids
+
+
+def expected(key, descending=False):
+    return [row["id"] for row in sorted(ROWS, key=lambda row: (row[key], row["id"]), reverse=descending)]
+
+
+@pytest.mark.parametrize("sort", ["id", "quantity", "price", "name"])
+def test_cursor_round_trip_visits_every_row_once(client, sort):
+    assert walk(client, sort=sort) == expected(sort)
+
+
+@pytest.mark.parametrize("sort", ["id", "quantity", "price"])
+def test_descending_order(client, sort):
+    assert walk(client, sort=sort, order="desc") == expected(sort, descending=True)
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_datetime_sort_key(client, order):
+    assert walk(client, sort="updated_at", order=order) == expected("updated_at", descending=order == "desc")
+
+
+def test_last_page_has_no_cursor(client):
+    page = client.get("/inventory/items/", params={"limit": ITEMS, "cursor": ""}).json()
+    assert len(page["items"]) == ITEMS and page["next_cursor"] is None
+
+
+def _forge(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor, params", [
+    ("not a cursor!", {}),
+    (_forge({"s": "id"}), {}),                                                # fields missing
+    (_forge(["s", "id"]), {}),                                                # not an object
+    (encode_cursor("quantity", False, 3, 10), {"sort": "price"}),             # other sort column
+    (encode_cursor("quantity", False, 3, 10), {"sort": "quantity", "order": "desc"}),
+    (_forge({"s": "updated_at", "d": False, "v": "yesterday", "id": 1}), {"sort": "updated_at"}),
+    (_forge({"s": "id", "d": False, "v": 1, "id": "x"}), {}),
+])
+def test_stale_or_forged_cursor_is_400(client, cursor, params):
+    response = client.get("/inventory/items/", params={**params, "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid or stale cursor"
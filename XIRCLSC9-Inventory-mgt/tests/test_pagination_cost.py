@@ -0,0 +1,81 @@
+# tests/test_pagination_cost.py
+"""Page 10,000 of a keyset listing costs about what page 1 does (OFFSET does not)."""
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import crud, database, models
+from app.main import app
+from app.pagination import encode_cursor
+from tests.support import insert_rows, query_plan, reset_item_tables
+
+LIMIT = 20
+DEEP_PAGE = 10_000
+ITEMS = LIMIT * (DEEP_PAGE + 5)
+BASE_TIME = datetime(2025, 7, 1)
+
+
+@pytest.fixture(scope="module")
+def portal():
+    async def seed():
+        await reset_item_tables()
+        await insert_rows(models.Category.__table__, [{"id": 1, "name": "category"}])
+        await insert_rows(models.Supplier.__table__, [{"id": 1, "name": "supplier"}])
+        await insert_rows(models.Item.__table__, [
+            {"id": n, "name": f"item {n}", "quantity": n % 1000, "price": 1.0, "category_id": 1, "supplier_id": 1,
+             "updated_at": BASE_TIME + timedelta(seconds=n)}
+            for n in range(1, ITEMS + 1)
+        ])
+        async with database.engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+
+    with TestClient(app) as client:
+        client.portal.call(seed)
+        yield client.portal
+
+
+def timed(portal, runs=7, **kwargs):
+    async def page():
+        async with database.AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            if "skip" in kwargs:
+                rows = await crud.get_items(db, limit=LIMIT, **kwargs)
+            else:
+                rows, _ = await crud.get_items_page(db, limit=LIMIT, **kwargs)
+            elapsed = time.perf_counter() - start
+        assert len(rows) == LIMIT
+        return elapsed
+    portal.call(page)  # warm-up
+    return statistics.median(portal.call(page) for _ in range(runs))
+
+
+def deep_cursor(sort):
+    # the cursor page DEEP_PAGE - 1 would hand out: last row of that page
+    last = LIMIT * (DEEP_PAGE - 1)
+    value = {"id": last, "updated_at": BASE_TIME + timedelta(seconds=last)}[sort]
+    return encode_cursor(sort, False, value, last)
+
+
+@pytest.mark.parametrize("sort", ["id", "updated_at"])
+def test_deep_keyset_page_costs_about_the_same_as_the_first(portal, sort):
+    first = timed(portal, sort=sort, cursor="")
+    deep = timed(portal, sort=sort, cursor=deep_cursor(sort))
+    offset = timed(portal, sort=sort, skip=LIMIT * (DEEP_PAGE - 1))
+    print(f"\n{sort}: page 1 {first * 1000:.2f} ms, page {DEEP_PAGE} {deep * 1000:.2f} ms, OFFSET {offset * 1000:.2f} ms")
+    # generous bound against timer noise; OFFSET is orders of magnitude away
+    assert deep < first * 3 + 0.002
+    assert offset > deep * 5
+
+
+def test_deep_page_seeks_the_sort_index(portal):
+    async def deep_page():
+        async with database.AsyncSessionLocal() as db:
+            await crud.get_items_page(db, limit=LIMIT, sort="updated_at", cursor=deep_cursor("updated_at"))
+
+    plan = portal.call(query_plan, deep_page)
+    assert "SEARCH items USING INDEX ix_items_updated_at_id" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan  # no sort step: rows come off the index in order
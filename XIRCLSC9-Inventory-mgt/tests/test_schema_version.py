@@ -0,0 +1,52 @@
+# tests/test_schema_version.py
+"""Workers refuse to start unless the database is at the newest Alembic revision."""
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app import database
+
+
+async def _set_revision(revision):
+    async with database.engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        if revision is not None:
+            await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+            await conn.execute(text("INSERT INTO alembic_version VALUES (:revision)"), {"revision": revision})
+
+
+def _check(revision):
+    async def run():
+        await _set_revision(revision)
+        try:
+            await database.check_schema_version()
+        finally:
+            await _set_revision(None)
+            await database.engine.dispose()
+    asyncio.run(run())
+
+
+def test_unmigrated_database_is_refused():
+    with pytest.raises(RuntimeError, match="revision None"):
+        _check(None)
+
+
+def test_older_revision_is_refused():
+    head = database.expected_schema_version()
+    with pytest.raises(RuntimeError, match=f"revision 0001, this code needs {head}"):
+        _check("0001")
+
+
+def test_head_revision_is_accepted():
+    _check(database.expected_schema_version())
+
+
+def test_startup_check_is_fast():
+    # reads the revision scripts and one row; never compares or creates tables
+    head = database.expected_schema_version()
+    started = time.perf_counter()
+    _check(head)
+    elapsed = time.perf_counter() - started
+    assert elapsed < 0.5, f"schema check took {elapsed:.3f}s"